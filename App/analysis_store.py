@@ -0,0 +1,276 @@
+"""
+Cache of app analyses in the dashboard's app_analysis table, keyed by screen content.
+"""
+
+import json
+import sqlite3
+import threading
+import config
+from app_analysis import AppAnalysis
+from title_normalizer import ITEM, get_site_index, learn_title, split_title, window_key
+
+# Columns and indexes this store relies on (also in Dashboard/schema.sql)
+EXTRA_COLUMNS = {
+    "window_key": "TEXT",
+    "content_digest": "TEXT",
+    "content_hashes": "TEXT",
+}
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_app_analysis_digest
+    ON app_analysis (app_name, window_key, content_digest, last_updated);
+CREATE INDEX IF NOT EXISTS idx_app_analysis_window_key
+    ON app_analysis (app_name, window_key, last_updated);
+CREATE INDEX IF NOT EXISTS idx_app_analysis_window_name
+    ON app_analysis (app_name, window_name);
+"""
+
+def jaccard(a, b):
+    """Share of lines two screens have in common (0-1)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class AnalysisStore:
+    def __init__(self, db_path, max_age=None, min_similarity=None, keep_per_window=None):
+        """
+        Open the store on the dashboard database.
+
+        Args:
+            db_path: Path to the dashboard SQLite database (with an app_analysis table)
+            max_age: Seconds a stored analysis stays fresh
+            min_similarity: Share of lines a screen must share with an analyzed
+                one for that analysis to be revised rather than redone
+            keep_per_window: Analyses kept per (app, window) before the oldest are dropped
+        """
+        self.db_path = db_path
+        self.max_age = config.ANALYSIS_CACHE_MAX_AGE if max_age is None else max_age
+        self.min_similarity = (config.ANALYSIS_CACHE_MIN_SIMILARITY
+                               if min_similarity is None else min_similarity)
+        self.keep_per_window = (config.ANALYSIS_CACHE_PER_WINDOW
+                                if keep_per_window is None else keep_per_window)
+        self.conn = sqlite3.connect(db_path, timeout=config.SCREENPIPE_BUSY_TIMEOUT,
+                                    check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.ensure_schema()
+        self.refresh_window_keys()
+
+    def ensure_schema(self):
+        """Add the fingerprint columns and lookup indexes to app_analysis if missing."""
+        with self._lock:
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(app_analysis)")}
+            if not columns:
+                raise sqlite3.OperationalError(f"no app_analysis table in {self.db_path}")
+            for name, column_type in EXTRA_COLUMNS.items():
+                if name not in columns:
+                    print(f"Adding {name} column to app_analysis table...")
+                    self.conn.execute(f"ALTER TABLE app_analysis ADD COLUMN {name} {column_type}")
+            self.conn.executescript(INDEXES)
+            self.conn.commit()
+
+    def refresh_window_keys(self):
+        """
+        Rebuild the site index from the stored titles, then recompute stored
+        window keys that were made under different title rules.
+
+        Old rows are pruned per window key, so a site is also recovered from
+        the keys ("* - site") stored with its titles.
+        """
+        index = get_site_index()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, app_name, window_name, window_key FROM app_analysis ORDER BY id"
+            ).fetchall()
+            for _, _, window_name, key in rows:
+                index.learn(window_name)
+                segments = split_title(window_name)
+                if len(segments) >= 2 and key in (f"{ITEM} - {segments[-1]}", f"{segments[0]} - {ITEM}"):
+                    index.add_site(segments[-1] if key.startswith(ITEM) else segments[0])
+            stale = [(window_key(app_name, window_name), row_id)
+                     for row_id, app_name, window_name, key in rows
+                     if key != window_key(app_name, window_name)]
+            if stale:
+                with self.conn:
+                    self.conn.executemany("UPDATE app_analysis SET window_key = ? WHERE id = ?", stale)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self.conn.close()
+
+    def lookup(self, app_name, window_name, fingerprint):
+        """
+        Find a fresh analysis of exactly the same screen.
+
+        A stored analysis is reused if it is younger than max_age and has the
+        same content digest (an indexed lookup). A screen that changed even a
+        little is left to the caller (see nearest).
+
+        Args:
+            app_name: Current app
+            window_name: Current window title
+            fingerprint: (digest, line hashes) from content_fingerprint
+
+        Returns:
+            An AppAnalysis with source "stored", or None
+        """
+        if not fingerprint:
+            return None
+        digest = fingerprint[0]
+        window = window_key(app_name, window_name)
+        # last_updated is stored as UTC by SQLite's datetime('now')
+        fresh_since = f"-{int(self.max_age)} seconds"
+
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT analysis_json FROM app_analysis
+                WHERE app_name = ? AND window_key = ? AND content_digest = ?
+                  AND last_updated >= datetime('now', ?)
+                ORDER BY last_updated DESC LIMIT 1
+                """,
+                (app_name, window, digest, fresh_since)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return self._to_analysis(row[0])
+            self.misses += 1
+            return None
+
+    def nearest(self, app_name, window_name, fingerprint):
+        """
+        Find the fresh analysis of the most similar earlier screen of this window.
+
+        The analysis is not reused as is: the caller sends the lines that are
+        new since then to be checked against it.
+
+        Args:
+            app_name: Current app
+            window_name: Current window title
+            fingerprint: (digest, line hashes) from content_fingerprint
+
+        Returns:
+            (AppAnalysis with source "stored", line hashes of that screen) of
+            the newest analyses of the same app and window sharing at least
+            min_similarity of their lines with this screen, or None
+        """
+        if not fingerprint:
+            return None
+        line_hashes = fingerprint[1]
+        window = window_key(app_name, window_name)
+        fresh_since = f"-{int(self.max_age)} seconds"
+
+        with self._lock:
+            candidates = self.conn.execute(
+                """
+                SELECT analysis_json, content_hashes FROM app_analysis
+                WHERE app_name = ? AND window_key = ? AND last_updated >= datetime('now', ?)
+                  AND content_hashes != ''
+                ORDER BY last_updated DESC LIMIT ?
+                """,
+                (app_name, window, fresh_since, self.keep_per_window)
+            ).fetchall()
+        best = None
+        for analysis_json, content_hashes in candidates:
+            stored_hashes = set(content_hashes.split())
+            similarity = jaccard(line_hashes, stored_hashes)
+            if similarity >= self.min_similarity and (best is None or similarity > best[0]):
+                best = (similarity, analysis_json, stored_hashes)
+        if best is None:
+            return None
+        analysis = self._to_analysis(best[1])
+        if analysis is None:
+            return None
+        with self._lock:
+            self.similar_hits += 1
+        return analysis, best[2]
+
+    def latest(self, app_name, window_name=None):
+        """
+        Most recent stored analysis of an app, whatever its age or content.
+
+        Used while Gemini is unavailable; an analysis of the same window is
+        preferred over one of another window of the app.
+
+        Returns:
+            An AppAnalysis with source "cached", or None
+        """
+        window = window_key(app_name, window_name)
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT analysis_json FROM app_analysis
+                WHERE app_name = ? AND analysis_json IS NOT NULL
+                ORDER BY window_key = ? DESC, last_updated DESC, id DESC LIMIT 1
+                """,
+                (app_name, window)
+            ).fetchone()
+        analysis = self._to_analysis(row[0]) if row else None
+        if analysis:
+            analysis.source = "cached"
+        return analysis
+
+    @staticmethod
+    def _to_analysis(analysis_json):
+        try:
+            data = json.loads(analysis_json)
+        except (TypeError, ValueError):
+            return None
+        analysis = AppAnalysis.from_dict(data)
+        analysis.source = "stored"
+        return analysis
+
+    def save(self, app_name, window_name, browser_url, fingerprint, analysis):
+        """
+        Store a Gemini analysis of the current screen.
+
+        Only the newest keep_per_window analyses of each app and window are kept.
+        """
+        if not analysis.ok or analysis.degraded:
+            return
+        digest, line_hashes = fingerprint or (None, set())
+        learn_title(window_name)
+        window = window_key(app_name, window_name)
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    """
+                    INSERT INTO app_analysis (
+                        app_name, window_name, browser_url, category, is_appropriate,
+                        age_rating, educational_value, potential_concerns, alternatives,
+                        analysis_json, last_updated, window_key, content_digest, content_hashes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), ?, ?, ?)
+                    """,
+                    (
+                        app_name, window_name or '', browser_url or '', analysis.category,
+                        1 if analysis.is_appropriate else 0, analysis.age_rating,
+                        analysis.educational_value, analysis.concerns_text(),
+                        analysis.alternatives_text(), analysis.to_json(),
+                        window, digest, " ".join(sorted(line_hashes))
+                    )
+                )
+                self.conn.execute(
+                    """
+                    DELETE FROM app_analysis
+                    WHERE app_name = ? AND window_key = ? AND id NOT IN (
+                        SELECT id FROM app_analysis
+                        WHERE app_name = ? AND window_key = ?
+                        ORDER BY last_updated DESC, id DESC LIMIT ?
+                    )
+                    """,
+                    (app_name, window, app_name, window, self.keep_per_window)
+                )
+
+    def get_stats(self):
+        """Return exact hits, misses and similar screens found for revision."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,224 @@
+"""
+Structured (JSON) app analysis: the response schema sent to Gemini and the parsed result.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+CATEGORIES = ["Games", "Education", "Social Media", "Entertainment", "Productivity", "Communication", "Other"]
+AGE_RATINGS = ["Everyone", "9+", "12+", "16+", "18+"]
+
+# Gemini responseSchema (OpenAPI subset) for one analysis
+ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "app_name": {"type": "STRING"},
+        "category": {"type": "STRING", "enum": CATEGORIES},
+        "is_appropriate": {"type": "BOOLEAN"},
+        "is_educational": {"type": "BOOLEAN"},
+        "age_rating": {"type": "STRING", "enum": AGE_RATINGS},
+        "educational_value": {"type": "INTEGER"},
+        "recommended_minutes": {"type": "INTEGER"},
+        "potential_concerns": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "alternatives": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "summary": {"type": "STRING"}
+    },
+    "required": ["app_name", "category", "is_appropriate", "is_educational",
+                 "age_rating", "educational_value", "potential_concerns"]
+}
+
+ANALYSIS_FIELDS = (
+    "app_name; "
+    f"category (one of {', '.join(CATEGORIES)}); "
+    "is_appropriate (true/false); "
+    "is_educational (true if educational or productive); "
+    f"age_rating (one of {', '.join(AGE_RATINGS)}); "
+    "educational_value (0-10); "
+    "recommended_minutes (daily minutes for this child); "
+    "potential_concerns (short strings, empty if none); "
+    "alternatives (2-3 more suitable apps if needed); "
+    "summary (one sentence)."
+)
+
+def build_analysis_prompt(child_age=None, app_name=None, window_name=None):
+    """
+    Build the question asking for a structured analysis of the screen.
+
+    Args:
+        child_age: Age of the child the analysis is for (None: minors in general)
+        app_name: App name reported by the system, if known
+        window_name: Window title reported by the system, if known
+    """
+    audience = f"a {child_age}-year-old child" if child_age else "minors"
+    prompt = (
+        f"analyze the application in use and whether it is appropriate for {audience}. "
+        f"Reply with one JSON object with these fields: {ANALYSIS_FIELDS}"
+    )
+    if app_name:
+        prompt += f" Current app name according to system: {app_name} {window_name or ''}".rstrip()
+    return prompt
+
+def build_revision_prompt(previous, child_age=None, app_name=None, window_name=None):
+    """
+    Build the question asking to confirm or revise an earlier analysis from new screen text only.
+
+    Args:
+        previous: AppAnalysis made from the earlier content of the same window
+        child_age: Age of the child the analysis is for (None: minors in general)
+        app_name: App name reported by the system, if known
+        window_name: Window title reported by the system, if known
+    """
+    audience = f"a {child_age}-year-old child" if child_age else "minors"
+    verdict = {name: value for name, value in previous.to_dict().items() if name in ANALYSIS_SCHEMA["properties"]}
+    prompt = (
+        "the text above is only what appeared on screen since the application was last analyzed. "
+        f"The earlier analysis (for {audience}) was: {json.dumps(verdict)} "
+        "Confirm it, or revise it if the new text changes the verdict. "
+        f"Reply with one JSON object with these fields: {ANALYSIS_FIELDS}"
+    )
+    if app_name:
+        prompt += f" Current app name according to system: {app_name} {window_name or ''}".rstrip()
+    return prompt
+
+def _as_list(value):
+    """Accept a list or a single string; return a list of non-empty strings."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+def _as_bool(value, default):
+    """Accept a JSON boolean or a yes/no style string."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "y", "1")
+    return default if value is None else bool(value)
+
+@dataclass
+class AppAnalysis:
+    app_name: str = "Unknown"
+    category: str = "Other"
+    is_appropriate: bool = True
+    is_educational: bool = False
+    age_rating: str = "Unknown"
+    educational_value: int = 0
+    recommended_minutes: Optional[int] = None
+    potential_concerns: List[str] = field(default_factory=list)
+    alternatives: List[str] = field(default_factory=list)
+    summary: str = ""
+    error: Optional[str] = None  # Set when no usable analysis came back
+    source: str = "gemini"  # gemini; reused: stored, local; or a fallback: cached, heuristic
+
+    @property
+    def ok(self):
+        """True if this is a real analysis rather than an error placeholder."""
+        return self.error is None
+
+    @property
+    def degraded(self):
+        """True if this answer was not just made by Gemini (reused or a fallback)."""
+        return self.source != "gemini"
+
+    @property
+    def fallback(self):
+        """True if Gemini was unavailable and this is an estimate (an older verdict or a heuristic)."""
+        return self.source in ("cached", "heuristic")
+
+    @classmethod
+    def from_error(cls, message):
+        """An empty analysis recording why none is available."""
+        return cls(error=message)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an analysis from a decoded JSON object, normalizing the values."""
+        category = str(data.get("category") or "Other").strip()
+        matches = [name for name in CATEGORIES if name.lower() == category.lower()]
+        age_rating = str(data.get("age_rating") or "Unknown").strip()
+        if age_rating not in AGE_RATINGS:
+            age_rating = "Unknown"
+        try:
+            educational_value = max(0, min(10, int(data.get("educational_value") or 0)))
+        except (TypeError, ValueError):
+            educational_value = 0
+        try:
+            recommended_minutes = int(data["recommended_minutes"])
+        except (KeyError, TypeError, ValueError):
+            recommended_minutes = None
+        return cls(
+            app_name=str(data.get("app_name") or "Unknown").strip(),
+            category=matches[0] if matches else "Other",
+            is_appropriate=_as_bool(data.get("is_appropriate"), True),
+            is_educational=_as_bool(data.get("is_educational"), False),
+            age_rating=age_rating,
+            educational_value=educational_value,
+            recommended_minutes=recommended_minutes,
+            potential_concerns=_as_list(data.get("potential_concerns")),
+            alternatives=_as_list(data.get("alternatives")),
+            summary=str(data.get("summary") or "").strip()
+        )
+
+    def to_dict(self):
+        """Plain dictionary (for JSON responses)."""
+        return asdict(self)
+
+    def to_json(self):
+        """JSON text (stored in analysis_json columns)."""
+        return json.dumps(self.to_dict())
+
+    def concerns_text(self):
+        """Concerns as one line ('None' if there are none)."""
+        return ", ".join(self.potential_concerns) or "None"
+
+    def alternatives_text(self):
+        """Alternatives as one line ('None' if there are none)."""
+        return ", ".join(self.alternatives) or "None"
+
+    def __str__(self):
+        """Human-readable report, as shown by the CLI."""
+        if self.error:
+            return self.error
+        lines = [
+            f"Currently Using: {self.app_name}",
+            f"Category of App: {self.category}",
+            f"Is this App suitable for minors: {'Yes' if self.is_appropriate else 'No'}",
+        ]
+        if self.recommended_minutes is not None:
+            lines.append(f"The recommended usage time for minors: {self.recommended_minutes} minutes per day")
+        lines += [
+            f"Age Rating: {self.age_rating}",
+            f"Potential Concerns: {self.concerns_text()}",
+            f"Educational Value: {self.educational_value}/10",
+            f"Alternative Apps: {self.alternatives_text()}",
+        ]
+        if self.summary:
+            lines.append(self.summary)
+        return "\n".join(lines)
+
+def parse_analysis(text):
+    """
+    Parse a JSON analysis response.
+
+    Args:
+        text: Response text (JSON, possibly in a Markdown code fence), or an
+            error message from LlamaClient
+
+    Returns:
+        An AppAnalysis; its error is set if the text wasn't an analysis
+    """
+    if not text:
+        return AppAnalysis.from_error("Empty analysis response")
+    body = text.strip()
+    if body.startswith("```"):
+        body = body.strip("`")
+        body = body[body.find("{"):]
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return AppAnalysis.from_error(text)
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        data = data[0]
+    if not isinstance(data, dict):
+        return AppAnalysis.from_error(text)
+    return AppAnalysis.from_dict(data)
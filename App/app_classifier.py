@@ -0,0 +1,195 @@
+"""
+Local fast-path classification of apps, domains and window titles already analyzed before.
+"""
+
+import re
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+import config
+from app_analysis import AppAnalysis
+from title_normalizer import is_browser, learn_title, window_key
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# What is on screen varies within these apps, so their screen text is always checked
+CONTENT_CATEGORIES = {"Social Media", "Communication", "Entertainment"}
+
+def normalize_app(app_name):
+    """Index key for an app name."""
+    return WHITESPACE_RE.sub(" ", (app_name or "").strip().lower())
+
+def domain_labels(browser_url):
+    """Host labels of a URL from the top-level domain down, without 'www' (e.g. ['com', 'youtube', 'm'])."""
+    if not browser_url:
+        return []
+    url = browser_url if "//" in browser_url else "//" + browser_url
+    try:
+        host = urlsplit(url).hostname or ""
+    except ValueError:
+        return []
+    labels = [label for label in host.lower().split(".") if label]
+    if labels and labels[0] == "www":
+        labels = labels[1:]
+    return list(reversed(labels))
+
+class Observations:
+    def __init__(self):
+        """Verdicts seen for one app, domain or window title."""
+        self.verdicts = Counter()  # (category, is_appropriate) -> count
+        self.latest = {}  # verdict -> most recent analysis with that verdict
+
+    def add(self, analysis):
+        verdict = (analysis.category, analysis.is_appropriate)
+        self.verdicts[verdict] += 1
+        self.latest[verdict] = analysis
+
+    def best(self):
+        """Return (analysis for the most common verdict, its share, total observations)."""
+        total = sum(self.verdicts.values())
+        verdict, count = self.verdicts.most_common(1)[0]
+        return self.latest[verdict], count / total, total
+
+class AppClassifier:
+    def __init__(self, min_observations=None, min_confidence=None):
+        """
+        Initialize an empty classifier.
+
+        Args:
+            min_observations: Analyses needed before a key is trusted
+            min_confidence: Share of those analyses that must agree
+                (same category and appropriateness)
+        """
+        self.min_observations = (config.LOCAL_CLASSIFIER_MIN_OBSERVATIONS
+                                 if min_observations is None else min_observations)
+        self.min_confidence = (config.LOCAL_CLASSIFIER_MIN_CONFIDENCE
+                               if min_confidence is None else min_confidence)
+        self.apps = {}  # normalized app name -> Observations
+        self.titles = {}  # (normalized app name, window title template) -> Observations
+        self.domains = {}  # trie of reversed host labels; "" holds a node's Observations
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def seed_from_db(self, conn):
+        """
+        Learn every stored analysis in an app_analysis table.
+
+        All titles are learned first, so every analysis is keyed on the
+        window templates the stored titles give together.
+
+        Args:
+            conn: sqlite3 connection to the dashboard database
+
+        Returns:
+            Number of analyses learned
+        """
+        rows = conn.execute(
+            """
+            SELECT app_name, window_name, browser_url, category, is_appropriate, age_rating,
+                   educational_value, potential_concerns, alternatives
+            FROM app_analysis
+            """
+        ).fetchall()
+        for row in rows:
+            learn_title(row[1])
+        for row in rows:
+            analysis = AppAnalysis(
+                app_name=row[0] or "Unknown",
+                category=row[3] or "Other",
+                is_appropriate=bool(row[4]) if row[4] is not None else True,
+                age_rating=row[5] or "Unknown",
+                educational_value=row[6] if isinstance(row[6], int) else 0,
+                potential_concerns=[item for item in (row[7] or "").split(", ") if item and item != "None"],
+                alternatives=[item for item in (row[8] or "").split(", ") if item and item != "None"]
+            )
+            self.learn(row[0], row[1], row[2], analysis)
+        return len(rows)
+
+    def learn(self, app_name, window_name, browser_url, analysis):
+        """Record a (Gemini) analysis of an app, window title and URL."""
+        if not analysis.ok or analysis.degraded:
+            return
+        app = normalize_app(app_name)
+        learn_title(window_name)
+        with self._lock:
+            if app:
+                self.apps.setdefault(app, Observations()).add(analysis)
+                if window_name:
+                    self.titles.setdefault((app, window_key(app_name, window_name)), Observations()).add(analysis)
+
+            # A site counts for its registrable domain and every subdomain below it
+            node = self.domains
+            for depth, label in enumerate(domain_labels(browser_url), 1):
+                node = node.setdefault(label, {})
+                if depth >= 2:
+                    node.setdefault("", Observations()).add(analysis)
+
+    def _confident(self, observations):
+        """
+        The analysis to reuse, or None if there is too little or too mixed
+        evidence, or if it is an app or site whose content varies (see
+        CONTENT_CATEGORIES).
+        """
+        if observations is None:
+            return None
+        analysis, confidence, total = observations.best()
+        if analysis.category in CONTENT_CATEGORIES:
+            return None
+        if total >= self.min_observations and confidence >= self.min_confidence:
+            return analysis
+        return None
+
+    def _lookup_domain(self, browser_url):
+        """Most specific confident match in the domain trie."""
+        best = None
+        node = self.domains
+        for label in domain_labels(browser_url):
+            node = node.get(label)
+            if node is None:
+                break
+            best = self._confident(node.get("")) or best
+        return best
+
+    def classify(self, app_name, window_name=None, browser_url=None):
+        """
+        Classify from known apps, domains and window titles.
+
+        The URL's domain is checked first, then the window title, then the
+        app name. Browsers are only classified by domain: Screenpipe often
+        leaves the URL empty, and neither the browser's name nor a page
+        title says enough about the site. Apps and sites whose content
+        varies (chat, social media, video) are never classified locally, so
+        their screen text is always checked.
+
+        Returns:
+            An AppAnalysis with source "local", or None to ask the model
+        """
+        app = normalize_app(app_name)
+        by_name = not is_browser(app_name)
+        with self._lock:
+            self.stats["lookups"] += 1
+            matches = (
+                ("domain_hits", self._lookup_domain(browser_url) if browser_url else None),
+                ("title_hits", self._confident(self.titles.get((app, window_key(app_name, window_name))))
+                               if window_name and by_name else None),
+                # With a URL the app name says nothing about the site
+                ("app_hits", self._confident(self.apps.get(app))
+                             if by_name and not browser_url else None),
+            )
+            for tier, analysis in matches:
+                if analysis:
+                    self.stats[tier] += 1
+                    return AppAnalysis(**dict(analysis.to_dict(), app_name=app_name or analysis.app_name,
+                                              source="local"))
+            self.stats["misses"] += 1
+            return None
+
+    def get_stats(self):
+        """Return lookups, hits per tier, misses and the overall hit rate."""
+        with self._lock:
+            stats = {name: self.stats[name] for name in
+                     ("lookups", "domain_hits", "title_hits", "app_hits", "misses")}
+            stats["known_apps"] = len(self.apps)
+        hits = stats["domain_hits"] + stats["title_hits"] + stats["app_hits"]
+        stats["hit_rate"] = hits / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
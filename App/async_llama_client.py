@@ -0,0 +1,79 @@
+"""
+Asyncio front end for LlamaClient with bounded concurrency.
+"""
+
+import asyncio
+import config
+from llama_client import LlamaClient
+
+class AsyncLlamaClient:
+    def __init__(self, llama_client=None, max_concurrency=None):
+        """
+        Initialize the async client.
+
+        Requests go through a (shared) LlamaClient, so prompt building, safety
+        settings, rate limiting and the pooled HTTP session are the same as
+        for blocking calls; each call runs in a worker thread.
+
+        Args:
+            llama_client: LlamaClient to send requests through (a new one if omitted)
+            max_concurrency: Maximum number of requests in flight at once
+        """
+        self.llama = llama_client or LlamaClient()
+        self.max_concurrency = max_concurrency or config.GEMINI_MAX_CONCURRENCY
+
+    async def query(self, ocr_text, user_query, semaphore=None):
+        """Send one query without blocking the event loop."""
+        if semaphore is None:
+            return await asyncio.to_thread(self.llama.query, ocr_text, user_query)
+        async with semaphore:
+            return await asyncio.to_thread(self.llama.query, ocr_text, user_query)
+
+    async def query_many(self, items):
+        """
+        Send several queries at once, at most max_concurrency at a time.
+
+        Args:
+            items: List of (ocr_text, user_query) tuples
+
+        Returns:
+            A list of responses in the same order as items
+        """
+        # Created here so it belongs to the running event loop
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(
+            self.query(ocr_text, user_query, semaphore) for ocr_text, user_query in items
+        ))
+
+    def run_many(self, items):
+        """Blocking wrapper around query_many for synchronous callers."""
+        return asyncio.run(self.query_many(items))
+
+    async def query_batch(self, items, batch_size=None, max_tokens=None, response_schema=None):
+        """
+        Answer items with LlamaClient.query_batch, sending the batches concurrently.
+
+        Args:
+            items: List of (ocr_text, user_query) tuples
+            batch_size: Maximum items per request
+            max_tokens: Output token limit of an item sent on its own
+            response_schema: Schema each answer must match (see LlamaClient.query_batch)
+
+        Returns:
+            A list of responses in the same order as items
+        """
+        batch_size = batch_size or config.GEMINI_BATCH_SIZE
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch):
+            async with semaphore:
+                return await asyncio.to_thread(self.llama.query_batch, batch, batch_size,
+                                               max_tokens, response_schema)
+
+        batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [response for batch_results in results for response in batch_results]
+
+    def run_batch(self, items, batch_size=None, max_tokens=None, response_schema=None):
+        """Blocking wrapper around query_batch for synchronous callers."""
+        return asyncio.run(self.query_batch(items, batch_size, max_tokens, response_schema))
@@ -0,0 +1,123 @@
+"""
+Circuit breaker for calls to the Gemini API.
+"""
+
+import threading
+import time
+from collections import deque
+import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit is open."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Gemini is unavailable; retrying in {retry_after:.0f} seconds.")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    def __init__(self, failure_rate=None, slow_call_seconds=None, window_size=None,
+                 min_calls=None, open_seconds=None):
+        """
+        Initialize the breaker (closed).
+
+        The breaker keeps the outcome of the last window_size calls. Once at
+        least min_calls are recorded and the share of failed or slow calls
+        reaches failure_rate, it opens: calls are refused for open_seconds.
+        Then a single probe call is let through (half-open); success closes
+        the circuit, failure opens it again.
+
+        Args:
+            failure_rate: Share of failed/slow calls (0-1) that opens the circuit
+            slow_call_seconds: Calls slower than this count as failures
+            window_size: Number of recent calls considered
+            min_calls: Calls needed before the failure rate is trusted
+            open_seconds: How long the circuit stays open before a probe
+        """
+        self.failure_rate = config.GEMINI_BREAKER_FAILURE_RATE if failure_rate is None else failure_rate
+        self.slow_call_seconds = (config.GEMINI_BREAKER_SLOW_CALL_SECONDS
+                                  if slow_call_seconds is None else slow_call_seconds)
+        self.min_calls = config.GEMINI_BREAKER_MIN_CALLS if min_calls is None else min_calls
+        self.open_seconds = config.GEMINI_BREAKER_OPEN_SECONDS if open_seconds is None else open_seconds
+        self.calls = deque(maxlen=window_size or config.GEMINI_BREAKER_WINDOW)
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a call may go ahead now (False while the circuit is open)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                # Let one probe through to find out whether the API is back
+                self.probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """Give back a call allow_request() let through but that was never made."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+
+    def retry_after(self):
+        """Seconds until the next probe is allowed (0 if the circuit is closed)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def record(self, success, seconds):
+        """
+        Record the outcome of a call that allow_request() let through.
+
+        Args:
+            success: False for errors (transport failures, 429/5xx)
+            seconds: How long the call took
+        """
+        failed = not success or seconds > self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+                if failed:
+                    self._open_locked()
+                else:
+                    print("Gemini circuit closed: probe call succeeded.")
+                    self.state = CLOSED
+                    self.calls.clear()
+                return
+
+            self.calls.append(failed)
+            if self.state == CLOSED and len(self.calls) >= self.min_calls:
+                if sum(self.calls) / len(self.calls) >= self.failure_rate:
+                    self._open_locked()
+
+    def _open_locked(self):
+        """Open the circuit; callers hold _lock."""
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        print(f"Gemini circuit opened: refusing calls for {self.open_seconds:.0f}s.")
+
+    def get_stats(self):
+        """Return the state, recent failure rate and counters."""
+        with self._lock:
+            failures = sum(self.calls)
+            return {
+                "state": self.state,
+                "recent_calls": len(self.calls),
+                "failure_rate": failures / len(self.calls) if self.calls else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
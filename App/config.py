@@ -11,6 +11,18 @@ SCREENPIPE_DB_PATH = os.environ.get(
     str(Path.home() / ".screenpipe" / "screenpipe.db")
 )
 
+# Read-only connection pool for the Screenpipe database
+SCREENPIPE_POOL_SIZE = int(os.environ.get("SCREENPIPE_POOL_SIZE", "4"))
+SCREENPIPE_MMAP_SIZE = int(os.environ.get("SCREENPIPE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SCREENPIPE_CACHE_SIZE = int(os.environ.get("SCREENPIPE_CACHE_SIZE", "-16000"))  # negative = KiB
+SCREENPIPE_STATEMENT_CACHE = int(os.environ.get("SCREENPIPE_STATEMENT_CACHE", "64"))
+
+# Screenpipe writes while we read: how long a read may wait on locks before failing
+SCREENPIPE_BUSY_TIMEOUT = float(os.environ.get("SCREENPIPE_BUSY_TIMEOUT", "5.0"))  # seconds, total
+SCREENPIPE_BUSY_TIMEOUT_MS = int(os.environ.get("SCREENPIPE_BUSY_TIMEOUT_MS", "50"))  # per attempt
+SCREENPIPE_RETRY_BASE_DELAY = float(os.environ.get("SCREENPIPE_RETRY_BASE_DELAY", "0.02"))
+SCREENPIPE_RETRY_MAX_DELAY = float(os.environ.get("SCREENPIPE_RETRY_MAX_DELAY", "0.5"))
+
 # Google Gemini configuration
 GEMINI_API_URL = os.environ.get(
     "GEMINI_API_URL", 
@@ -18,10 +30,137 @@ GEMINI_API_URL = os.environ.get(
 )
 LLAMA_TEMPERATURE = float(os.environ.get("GEMINI_TEMPERATURE", "0.7"))
 LLAMA_MAX_TOKENS = int(os.environ.get("GEMINI_MAX_TOKENS", "1024"))  # Reduced to be conservative
+ANALYSIS_MAX_TOKENS = int(os.environ.get("ANALYSIS_MAX_TOKENS", "384"))  # structured app analysis
+
+# Gemini HTTP transport: keep-alive pool, timeouts and retries
+GEMINI_POOL_MAXSIZE = int(os.environ.get("GEMINI_POOL_MAXSIZE", "8"))
+GEMINI_CONNECT_TIMEOUT = float(os.environ.get("GEMINI_CONNECT_TIMEOUT", "5"))  # seconds
+GEMINI_READ_TIMEOUT = float(os.environ.get("GEMINI_READ_TIMEOUT", "30"))  # seconds
+GEMINI_MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", "3"))
+GEMINI_RETRY_BASE_DELAY = float(os.environ.get("GEMINI_RETRY_BASE_DELAY", "1.0"))  # seconds
+GEMINI_RETRY_MAX_DELAY = float(os.environ.get("GEMINI_RETRY_MAX_DELAY", "15.0"))  # seconds
+GEMINI_TOTAL_TIMEOUT = float(os.environ.get("GEMINI_TOTAL_TIMEOUT", "45"))  # seconds, all attempts
+GEMINI_LATENCY_HISTORY = int(os.environ.get("GEMINI_LATENCY_HISTORY", "500"))  # requests kept
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "4"))  # async fan-out
+
+# Local fast path: reuse verdicts for apps, domains and window titles seen before
+LOCAL_CLASSIFIER_ENABLED = os.environ.get("LOCAL_CLASSIFIER_ENABLED", "true").lower() == "true"
+LOCAL_CLASSIFIER_MIN_OBSERVATIONS = int(os.environ.get("LOCAL_CLASSIFIER_MIN_OBSERVATIONS", "2"))
+LOCAL_CLASSIFIER_MIN_CONFIDENCE = float(os.environ.get("LOCAL_CLASSIFIER_MIN_CONFIDENCE", "0.8"))
+
+# Window titles: pages of these sites or apps (comma-separated, in addition to
+# the built-in list) share one cache key, e.g. "* - youtube"
+TITLE_ITEM_SITES = os.environ.get("TITLE_ITEM_SITES", "")
+TITLE_SITE_MIN_ITEMS = int(os.environ.get("TITLE_SITE_MIN_ITEMS", "3"))  # items before an end segment is a site
+TITLE_GROUP_MIN_SIMILARITY = float(os.environ.get("TITLE_GROUP_MIN_SIMILARITY", "0.6"))  # token Jaccard, 0-1
+TITLE_SIGNATURE_SIZE = int(os.environ.get("TITLE_SIGNATURE_SIZE", "16"))  # MinHash values per site name
+TITLE_MAX_TRACKED_SEGMENTS = int(os.environ.get("TITLE_MAX_TRACKED_SEGMENTS", "10000"))
+
+# Analysis cache: reuse a stored analysis while the app, window and screen content are unchanged
+ANALYSIS_CACHE_ENABLED = os.environ.get("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_MAX_AGE = int(os.environ.get("ANALYSIS_CACHE_MAX_AGE", str(6 * 3600)))  # seconds
+ANALYSIS_CACHE_MIN_SIMILARITY = float(os.environ.get("ANALYSIS_CACHE_MIN_SIMILARITY", "0.8"))  # shared lines, 0-1
+ANALYSIS_CACHE_PER_WINDOW = int(os.environ.get("ANALYSIS_CACHE_PER_WINDOW", "5"))  # analyses kept
+
+# Incremental analysis: while a window stays open, send only its new lines and the previous verdict
+INCREMENTAL_ANALYSIS_ENABLED = os.environ.get("INCREMENTAL_ANALYSIS_ENABLED", "true").lower() == "true"
+INCREMENTAL_MAX_CHANGE = float(os.environ.get("INCREMENTAL_MAX_CHANGE", "0.5"))  # share of new lines, 0-1
+INCREMENTAL_MAX_REVISIONS = int(os.environ.get("INCREMENTAL_MAX_REVISIONS", "5"))  # then a full analysis
+INCREMENTAL_MAX_CONTEXTS = int(os.environ.get("INCREMENTAL_MAX_CONTEXTS", "200"))  # windows remembered
+
+# Circuit breaker: stop calling Gemini while it is failing or slow
+GEMINI_BREAKER_FAILURE_RATE = float(os.environ.get("GEMINI_BREAKER_FAILURE_RATE", "0.5"))
+GEMINI_BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("GEMINI_BREAKER_SLOW_CALL_SECONDS", "10"))
+GEMINI_BREAKER_WINDOW = int(os.environ.get("GEMINI_BREAKER_WINDOW", "20"))  # recent calls
+GEMINI_BREAKER_MIN_CALLS = int(os.environ.get("GEMINI_BREAKER_MIN_CALLS", "5"))
+GEMINI_BREAKER_OPEN_SECONDS = float(os.environ.get("GEMINI_BREAKER_OPEN_SECONDS", "60"))
+
+# Batched analysis: several contexts answered by one request
+GEMINI_BATCH_SIZE = int(os.environ.get("GEMINI_BATCH_SIZE", "5"))  # items per request
+GEMINI_BATCH_ITEM_CHARS = int(os.environ.get("GEMINI_BATCH_ITEM_CHARS", "4000"))  # screen text per item
+GEMINI_BATCH_ITEM_TOKENS = int(os.environ.get("GEMINI_BATCH_ITEM_TOKENS", "512"))  # answer per item
+
+# Request budget shared by every process (half of the free tier's 60/minute)
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get("GEMINI_REQUESTS_PER_MINUTE", "30"))
+GEMINI_DAILY_LIMIT = int(os.environ.get("GEMINI_DAILY_LIMIT", "500"))
+GEMINI_RATE_LIMIT_PATH = os.environ.get(
+    "GEMINI_RATE_LIMIT_PATH",
+    str(Path.home() / ".screenpipe" / "gemini_rate_limit.db")
+)
 
 # Query configuration
 DEFAULT_TIME_WINDOW = int(os.environ.get("DEFAULT_TIME_WINDOW", "300"))  # 5 minutes
 MAX_OCR_TEXT_LENGTH = int(os.environ.get("MAX_OCR_TEXT_LENGTH", "4000"))  # Reduced to be conservative
+OCR_FETCH_BATCH_SIZE = int(os.environ.get("OCR_FETCH_BATCH_SIZE", "200"))  # rows per fetchmany
+CHARS_PER_TOKEN = int(os.environ.get("CHARS_PER_TOKEN", "4"))  # rough estimate for token budgets
+
+# Where OCR text comes from: "text" (ocr_text.text) or "json" (word-level ocr_text.text_json)
+OCR_TEXT_SOURCE = os.environ.get("OCR_TEXT_SOURCE", "text")
+OCR_MIN_CONFIDENCE = float(os.environ.get("OCR_MIN_CONFIDENCE", "60"))  # 0-100, json mode only
+TEXT_JSON_CACHE_SIZE = int(os.environ.get("TEXT_JSON_CACHE_SIZE", "5000"))  # parsed frames kept
+# Json mode only: "focused" keeps the words of the focused window's frames
+# (Screenpipe captures each window as its own frame), "left,top,width,height"
+# keeps words inside a fixed screen region, "" keeps everything
+OCR_REGION = os.environ.get("OCR_REGION", "")
+
+# Relevance-ranked context selection for user queries (BM25)
+RELEVANCE_RANKING_ENABLED = os.environ.get("RELEVANCE_RANKING_ENABLED", "true").lower() == "true"
+RANKING_CHUNK_CHARS = int(os.environ.get("RANKING_CHUNK_CHARS", "600"))
+RANKING_BM25_K1 = float(os.environ.get("RANKING_BM25_K1", "1.5"))
+RANKING_BM25_B = float(os.environ.get("RANKING_BM25_B", "0.75"))
+
+# Line-level OCR cleanup (boilerplate lines, whitespace, noise tokens)
+OCR_CLEANUP_ENABLED = os.environ.get("OCR_CLEANUP_ENABLED", "true").lower() == "true"
+OCR_BOILERPLATE_RATIO = float(os.environ.get("OCR_BOILERPLATE_RATIO", "0.6"))  # share of frames
+OCR_BOILERPLATE_MIN_FRAMES = int(os.environ.get("OCR_BOILERPLATE_MIN_FRAMES", "3"))
+OCR_NOISE_PATTERN = os.environ.get(
+    "OCR_NOISE_PATTERN",
+    # Clock times, runs of stray symbols and single non-word characters
+    r"\b\d{1,2}:\d{2}(:\d{2})?\s*(am|pm)?\b|[|_~=<>^*#`]{2,}|(?<!\S)[^\w\s](?!\S)"
+)
+
+# Near-duplicate frame elimination
+OCR_DEDUP_ENABLED = os.environ.get("OCR_DEDUP_ENABLED", "true").lower() == "true"
+OCR_DEDUP_MAX_DISTANCE = int(os.environ.get("OCR_DEDUP_MAX_DISTANCE", "3"))  # SimHash bits
+OCR_DEDUP_SHINGLE_SIZE = int(os.environ.get("OCR_DEDUP_SHINGLE_SIZE", "3"))  # words per shingle
+# With a text budget, dedupe reads this many budgets' worth of the newest text
+OCR_DEDUP_BUDGET_FACTOR = int(os.environ.get("OCR_DEDUP_BUDGET_FACTOR", "4"))
+
+# Where long-running monitors save their position in the OCR stream
+OCR_CURSOR_PATH = os.environ.get(
+    "OCR_CURSOR_PATH",
+    str(Path.home() / ".screenpipe" / "ocr_cursor.json")
+)
+
+# Sidecar full-text (FTS5) index over the OCR history
+OCR_INDEX_PATH = os.environ.get(
+    "OCR_INDEX_PATH",
+    str(Path.home() / ".screenpipe" / "ocr_search_index.db")
+)
+
+# Persistent cache of Gemini responses (repeated views of an unchanged screen)
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    str(Path.home() / ".screenpipe" / "llm_response_cache.db")
+)
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", "900"))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# Hierarchical summaries of the OCR history (minute -> hour -> day) for long-range questions
+SUMMARY_ENABLED = os.environ.get("SUMMARY_ENABLED", "true").lower() == "true"
+SUMMARY_DB_PATH = os.environ.get(
+    "SUMMARY_DB_PATH",
+    str(Path.home() / ".screenpipe" / "time_summaries.db")
+)
+SUMMARY_LOOKBACK_DAYS = int(os.environ.get("SUMMARY_LOOKBACK_DAYS", "2"))  # history summarized on first run
+SUMMARY_GRACE_SECONDS = int(os.environ.get("SUMMARY_GRACE_SECONDS", "60"))  # late frames before a bucket closes
+SUMMARY_RECHECK_SECONDS = int(os.environ.get("SUMMARY_RECHECK_SECONDS", "3600"))  # minutes rebuilt if OCR lands later
+SUMMARY_MINUTE_CHARS = int(os.environ.get("SUMMARY_MINUTE_CHARS", "300"))  # per minute (extracted locally)
+SUMMARY_MAX_TOKENS = int(os.environ.get("SUMMARY_MAX_TOKENS", "256"))  # per hour or day summary
+SUMMARY_CONTEXT_CHARS = int(os.environ.get("SUMMARY_CONTEXT_CHARS", "6000"))  # summaries sent with a query
+SUMMARY_INTERVAL = int(os.environ.get("SUMMARY_INTERVAL", "300"))  # seconds between background passes
 
 # System prompt for Gemini
 SYSTEM_PROMPT = """You are an assistant that helps analyze screen content captured by Screenpipe.
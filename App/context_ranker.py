@@ -0,0 +1,152 @@
+"""
+Relevance ranking of OCR chunks against a user query (BM25).
+"""
+
+import math
+import re
+from collections import Counter
+import config
+
+TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for",
+    "from", "had", "has", "have", "how", "i", "in", "is", "it", "me", "my", "of",
+    "on", "or", "so", "that", "the", "their", "them", "they", "this", "to", "was",
+    "we", "were", "what", "when", "where", "which", "who", "why", "with", "you", "your"
+}
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords."""
+    return [token for token in TOKEN_RE.findall(text.lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+def split_line(line, max_chars):
+    """Split a line into pieces of at most max_chars characters, at a space where possible."""
+    while len(line) > max_chars:
+        cut = line.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        yield line[:cut]
+        line = line[cut:].lstrip()
+    if line:
+        yield line
+
+def chunk_rows(rows, chunk_chars=None):
+    """
+    Split OCR rows into chunks of at most chunk_chars characters.
+
+    Chunks break on line boundaries and keep the metadata of their row, so
+    they can be formatted like ordinary OCR rows. Lines longer than a chunk
+    (json mode can rebuild a frame as one line) are split by characters.
+    """
+    chunk_chars = chunk_chars or config.RANKING_CHUNK_CHARS
+    chunks = []
+    for row in rows:
+        current = []
+        size = 0
+        lines = (piece for line in row['text'].splitlines()
+                 for piece in split_line(line, chunk_chars))
+        for line in lines:
+            if current and size + len(line) > chunk_chars:
+                chunk = dict(row)
+                chunk['text'] = "\n".join(current)
+                chunks.append(chunk)
+                current = []
+                size = 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            chunk = dict(row)
+            chunk['text'] = "\n".join(current)
+            chunks.append(chunk)
+    return chunks
+
+class BM25Ranker:
+    def __init__(self, k1=None, b=None):
+        """
+        Initialize the ranker.
+
+        Args:
+            k1: Term-frequency saturation
+            b: Document-length normalization
+        """
+        self.k1 = config.RANKING_BM25_K1 if k1 is None else k1
+        self.b = config.RANKING_BM25_B if b is None else b
+
+    def score(self, query, documents):
+        """
+        Score every document against the query in one pass over an inverted index.
+
+        The window is turned into sparse term vectors once; each query term then
+        adds its BM25 contribution to all documents that contain it, instead of
+        re-tokenizing the documents per term.
+
+        Args:
+            query: The user's question
+            documents: List of document strings
+
+        Returns:
+            A list of scores, one per document
+        """
+        query_terms = set(tokenize(query))
+        scores = [0.0] * len(documents)
+        if not query_terms or not documents:
+            return scores
+
+        # Postings only for terms that occur in the query
+        lengths = []
+        postings = {term: [] for term in query_terms}
+        for index, document in enumerate(documents):
+            tokens = tokenize(document)
+            lengths.append(len(tokens))
+            counts = Counter(token for token in tokens if token in query_terms)
+            for term, count in counts.items():
+                postings[term].append((index, count))
+
+        total = len(documents)
+        average_length = sum(lengths) / total or 1.0
+        for term, matches in postings.items():
+            if not matches:
+                continue
+            idf = math.log(1 + (total - len(matches) + 0.5) / (len(matches) + 0.5))
+            for index, count in matches:
+                norm = self.k1 * (1 - self.b + self.b * lengths[index] / average_length)
+                scores[index] += idf * count * (self.k1 + 1) / (count + norm)
+        return scores
+
+    def select(self, query, rows, max_chars, chunk_chars=None):
+        """
+        Pick the chunks most relevant to the query that fit in a character budget.
+
+        Args:
+            query: The user's question
+            rows: OCR data dictionaries for the whole window
+            max_chars: Character budget for the selected text
+            chunk_chars: Maximum size of one chunk
+
+        Returns:
+            The selected chunks as OCR rows, in timestamp order
+        """
+        chunks = chunk_rows(rows, chunk_chars)
+        scores = self.score(query, [chunk['text'] for chunk in chunks])
+
+        # Best score first; ties (including no match at all) go to the newest text
+        order = sorted(range(len(chunks)),
+                       key=lambda index: (scores[index], chunks[index]['timestamp'], index),
+                       reverse=True)
+
+        selected = []
+        used = 0
+        for index in order:
+            chunk = chunks[index]
+            # Leave room for the header and capture note the formatter adds
+            overhead = (len(chunk.get('app_name') or '') + len(chunk.get('window_name') or '') +
+                        len(chunk.get('browser_url') or '') + 64)
+            size = len(chunk['text']) + overhead
+            if used + size > max_chars:
+                continue
+            selected.append(index)
+            used += size
+
+        return [chunks[index] for index in sorted(selected, key=lambda index: (chunks[index]['timestamp'], index))]
@@ -0,0 +1,118 @@
+"""
+Thread-safe pool of read-only SQLite connections.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import config
+
+class ReadOnlyConnectionPool:
+    def __init__(self, db_path, max_size=None, mmap_size=None, cache_size=None,
+                 cached_statements=None):
+        """
+        Initialize a pool of read-only connections to a SQLite database.
+
+        Connections are opened lazily, kept open between calls and shared
+        between threads, so callers skip connection setup and schema parsing.
+        Each connection keeps its own cache of prepared statements, keyed by
+        the SQL text, so reusing the same query string reuses the statement.
+
+        Args:
+            db_path: Path to the SQLite database
+            max_size: Maximum number of open connections
+            mmap_size: PRAGMA mmap_size in bytes
+            cache_size: PRAGMA cache_size (negative values are KiB)
+            cached_statements: Number of prepared statements kept per connection
+        """
+        self.db_path = db_path
+        self.max_size = max_size or config.SCREENPIPE_POOL_SIZE
+        self.mmap_size = config.SCREENPIPE_MMAP_SIZE if mmap_size is None else mmap_size
+        self.cache_size = config.SCREENPIPE_CACHE_SIZE if cache_size is None else cache_size
+        self.cached_statements = cached_statements or config.SCREENPIPE_STATEMENT_CACHE
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        """Open a new read-only connection with tuned pragmas."""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=config.SCREENPIPE_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        # Short per-statement wait; callers retry with backoff on top of this
+        conn.execute(f"PRAGMA busy_timeout = {int(config.SCREENPIPE_BUSY_TIMEOUT_MS)}")
+        return conn
+
+    def _acquire(self, timeout):
+        """Take an idle connection, open a new one, or wait for one to be released."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if self._created < self.max_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out waiting for a connection to {self.db_path}"
+            )
+
+    def _release(self, conn):
+        """Return a connection to the pool, or close it if it can't be reused."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Drop connections left in a bad state instead of reusing them
+            with self._lock:
+                self._created -= 1
+            conn.close()
+            return
+
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout=30):
+        """Borrow a connection for the duration of a with-block."""
+        conn = self._acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Close every idle connection; borrowed ones are closed when released."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
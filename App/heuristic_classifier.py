@@ -0,0 +1,75 @@
+"""
+Keyword-based app classification used when Gemini is unavailable.
+"""
+
+import re
+from app_analysis import AppAnalysis
+
+# First matching category wins; keywords are matched as whole words
+CATEGORY_KEYWORDS = [
+    ("Games", ["minecraft", "roblox", "fortnite", "steam", "epic games", "game", "games", "gaming",
+               "twitch", "chess", "level", "score", "multiplayer"]),
+    ("Social Media", ["tiktok", "instagram", "facebook", "snapchat", "twitter", "reddit", "x.com",
+                      "followers", "likes", "feed"]),
+    ("Communication", ["discord", "whatsapp", "telegram", "messages", "slack", "zoom", "teams",
+                       "skype", "mail", "gmail", "outlook"]),
+    ("Entertainment", ["youtube", "netflix", "spotify", "disney", "hulu", "prime video", "music",
+                       "video", "watch", "episode"]),
+    ("Education", ["khan academy", "duolingo", "wikipedia", "coursera", "classroom", "quizlet",
+                   "scratch", "lesson", "homework", "math", "science", "learn", "dictionary"]),
+    ("Productivity", ["terminal", "code", "visual studio", "word", "excel", "powerpoint", "docs",
+                      "sheets", "notion", "calendar", "finder", "explorer", "settings"]),
+]
+
+# Content that makes a screen unsuitable for children
+UNSAFE_KEYWORDS = ["casino", "gambling", "betting", "poker", "porn", "xxx", "nsfw", "adult content",
+                   "onlyfans", "dating", "vape", "alcohol", "weapons", "gore"]
+
+AGE_RATING_BY_CATEGORY = {
+    "Games": "9+",
+    "Social Media": "12+",
+    "Communication": "12+",
+    "Entertainment": "Everyone",
+    "Education": "Everyone",
+    "Productivity": "Everyone",
+    "Other": "Unknown",
+}
+
+def _pattern(keywords):
+    return re.compile(r"\b(" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b", re.IGNORECASE)
+
+CATEGORY_PATTERNS = [(category, _pattern(keywords)) for category, keywords in CATEGORY_KEYWORDS]
+UNSAFE_PATTERN = _pattern(UNSAFE_KEYWORDS)
+
+def classify(app_name=None, window_name=None, browser_url=None, ocr_text=None):
+    """
+    Estimate an app analysis from names and screen text alone.
+
+    App name, window title and URL are checked before the screen text, since
+    they say more about what is in use.
+
+    Returns:
+        An AppAnalysis with source "heuristic"
+    """
+    identity = " ".join(part for part in (app_name, window_name, browser_url) if part)
+    category = "Other"
+    for text in (identity, ocr_text or ""):
+        for name, pattern in CATEGORY_PATTERNS:
+            if pattern.search(text):
+                category = name
+                break
+        if category != "Other":
+            break
+
+    concerns = sorted({match.lower() for match in UNSAFE_PATTERN.findall(f"{identity} {ocr_text or ''}")})
+    return AppAnalysis(
+        app_name=app_name or "Unknown",
+        category=category,
+        is_appropriate=not concerns,
+        is_educational=category in ("Education", "Productivity"),
+        age_rating="18+" if concerns else AGE_RATING_BY_CATEGORY[category],
+        educational_value=6 if category == "Education" else 0,
+        potential_concerns=[f"Mentions {concern}" for concern in concerns],
+        summary="Estimated locally from app name and screen text while Gemini is unavailable.",
+        source="heuristic"
+    )
@@ -9,9 +9,11 @@ allowing you to query your screen content using natural language.
 import argparse
 import sys
 import os
+import time
 from screenpipe_connector import ScreenpipeConnector
 from llama_client import LlamaClient
 from query_engine import QueryEngine
+from time_summaries import TimeBucketSummarizer, infer_horizon
 import config
 
 def parse_arguments():
@@ -21,15 +23,42 @@ def parse_arguments():
     parser.add_argument('--api-key', type=str, default=os.environ.get("GOOGLE_API_KEY", ""),
                         help='Google Gemini API key')
     parser.add_argument('--time-window', type=int, default=config.DEFAULT_TIME_WINDOW,
-                        help='Time window in seconds for retrieving OCR data')
+                        help='Time window in seconds for retrieving OCR data '
+                             '(queries send only the most relevant text, so hours are fine)')
     parser.add_argument('--query', type=str,
                         help='Query to run against screen content')
     parser.add_argument('--interactive', action='store_true',
                         help='Run in interactive mode')
     parser.add_argument('--analyze', action='store_true',
                         help='Automatically analyze current app')
+    parser.add_argument('--search', type=str,
+                        help='Full-text search over the OCR history (no Gemini call)')
+    parser.add_argument('--app', type=str,
+                        help='Only search frames from this application')
+    parser.add_argument('--since-hours', type=float,
+                        help='Period the query is about, in hours (default: inferred from the query, '
+                             'e.g. "this afternoon"); earlier activity comes from stored summaries')
     return parser.parse_args()
 
+def print_search_results(results):
+    """Print full-text search matches."""
+    if not results:
+        print("No matches found.")
+        return
+    for match in results:
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(match['timestamp']))
+        location = match['app_name'] or 'Unknown'
+        if match['window_name']:
+            location += f" - {match['window_name']}"
+        print(f"[{timestamp}] {location}")
+        print(f"    {match['snippet'].replace(chr(10), ' ')}")
+
+def print_stream(chunks):
+    """Print response chunks as soon as they arrive."""
+    for chunk in chunks:
+        print(chunk, end="", flush=True)
+    print()
+
 def interactive_mode(query_engine):
     """Run in interactive mode."""
     print("\nScreenpipe-Gemini Interactive Mode")
@@ -44,14 +73,12 @@ def interactive_mode(query_engine):
             break
         elif user_input.lower() == 'analyze':
             print("\nAnalyzing current app...")
-            result = query_engine.analyze_current_app()
             print("\nAnalysis Result:")
-            print(result)
+            print_stream(query_engine.analyze_current_app_stream())
         elif user_input.strip():
             print("\nProcessing query...")
-            result = query_engine.process_query(user_input)
             print("\nResponse:")
-            print(result)
+            print_stream(query_engine.process_query_stream(user_input))
 
 def main():
     args = parse_arguments()
@@ -65,6 +92,11 @@ def main():
             print("Error: Cannot connect to Screenpipe database")
             return 1
         
+        # Search only needs the local index
+        if args.search:
+            print_search_results(screenpipe.search(args.search, app=args.app))
+            return 0
+        
         # Set API key from args if provided
         if args.api_key:
             os.environ["GOOGLE_API_KEY"] = args.api_key
@@ -80,16 +112,27 @@ def main():
             print("Get a free API key at: https://makersuite.google.com/app/apikey")
             return 1
         
-        query_engine = QueryEngine(screenpipe, llama, args.time_window)
+        # Long-range questions are answered from minute/hour/day summaries
+        summarizer = TimeBucketSummarizer(screenpipe, llama) if config.SUMMARY_ENABLED else None
+        query_engine = QueryEngine(screenpipe, llama, args.time_window, summarizer=summarizer)
         
         # Run in appropriate mode
         if args.analyze:
             result = query_engine.analyze_current_app()
             print(result)
         elif args.interactive:
+            # Keep summarizing closed time buckets while the session is open
+            if summarizer:
+                summarizer.start()
             interactive_mode(query_engine)
         elif args.query:
-            result = query_engine.process_query(args.query)
+            seconds_ago = int(args.since_hours * 3600) if args.since_hours else None
+            # Nothing summarizes in the background here: bring the summaries
+            # up to date before a question about a longer period
+            horizon = seconds_ago or infer_horizon(args.query)
+            if summarizer and horizon and horizon > args.time_window:
+                summarizer.run_once()
+            result = query_engine.process_query(args.query, seconds_ago)
             print(result)
         else:
             # Default to analysis mode
@@ -0,0 +1,249 @@
+"""
+Local stand-in for the Gemini generateContent API, for offline load and latency testing.
+
+Point LlamaClient at it with:
+    GEMINI_API_URL=http://127.0.0.1:8765/v1/models/mock:generateContent GOOGLE_API_KEY=mock
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROUTE_RE = re.compile(r"^/v1(?:beta)?/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)$")
+BATCH_ITEM_RE = re.compile(r"--- Item (\d+) ")
+
+DEFAULT_TEMPLATE = "Mock response #{request_number} from {model} for a {prompt_chars}-character prompt."
+
+# Values used when building JSON that matches a responseSchema
+SAMPLE_VALUES = {"STRING": "mock", "INTEGER": 5, "NUMBER": 0.5, "BOOLEAN": True}
+
+def sample_from_schema(schema):
+    """Build a value matching a Gemini responseSchema (first enum value, sample scalars)."""
+    schema_type = str(schema.get("type", "STRING")).upper()
+    if schema.get("enum"):
+        return schema["enum"][0]
+    if schema_type == "OBJECT":
+        return {name: sample_from_schema(prop) for name, prop in schema.get("properties", {}).items()}
+    if schema_type == "ARRAY":
+        return [sample_from_schema(schema.get("items", {}))]
+    return SAMPLE_VALUES.get(schema_type, "mock")
+
+class MockBehavior:
+    def __init__(self, latency="constant", latency_ms=200.0, latency_spread=0.5,
+                 rate_429=0.0, rate_5xx=0.0, retry_after=None,
+                 template=DEFAULT_TEMPLATE, chunk_words=3, chunk_delay_ms=50.0, seed=None):
+        """
+        How the mock server responds.
+
+        Args:
+            latency: Latency distribution: constant, uniform, exponential or lognormal
+            latency_ms: Mean (median for lognormal) response latency in milliseconds
+            latency_spread: Spread: +/- fraction for uniform, sigma for lognormal
+            rate_429: Share of requests answered with 429
+            rate_5xx: Share of requests answered with 500/503
+            retry_after: Retry-After seconds sent with 429 responses (None: omitted)
+            template: Response text; {request_number}, {model}, {prompt_chars}
+                and {prompt_words} are filled in
+            chunk_words: Words per event when streaming
+            chunk_delay_ms: Delay between streamed events
+            seed: Random seed, for repeatable runs
+        """
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_spread = latency_spread
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.template = template
+        self.chunk_words = max(1, chunk_words)
+        self.chunk_delay_ms = chunk_delay_ms
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.status_counts = {}
+
+    def next_request(self):
+        """Count a request and pick its (request number, status, latency in seconds)."""
+        with self._lock:
+            self.request_count += 1
+            roll = self.random.random()
+            if roll < self.rate_429:
+                status = 429
+            elif roll < self.rate_429 + self.rate_5xx:
+                status = self.random.choice([500, 503])
+            else:
+                status = 200
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            return self.request_count, status, self._sample_latency() / 1000.0
+
+    def _sample_latency(self):
+        """Latency in milliseconds from the configured distribution; callers hold _lock."""
+        mean = self.latency_ms
+        if self.latency == "uniform":
+            return self.random.uniform(mean * (1 - self.latency_spread), mean * (1 + self.latency_spread))
+        if self.latency == "exponential":
+            return self.random.expovariate(1 / mean) if mean > 0 else 0.0
+        if self.latency == "lognormal":
+            return self.random.lognormvariate(math.log(mean), self.latency_spread) if mean > 0 else 0.0
+        return mean
+
+    def response_text(self, request_number, model, body):
+        """Text of a successful response to a request body."""
+        prompt = "".join(part.get("text", "")
+                         for content in body.get("contents", [])
+                         for part in content.get("parts", []))
+        generation_config = body.get("generationConfig", {})
+
+        if generation_config.get("responseMimeType") == "application/json":
+            item_numbers = [int(number) for number in BATCH_ITEM_RE.findall(prompt)]
+            schema = generation_config.get("responseSchema")
+            if item_numbers:
+                # Batched prompt: one answer per numbered item
+                return json.dumps({"results": [
+                    {"id": number, "answer": f"Mock answer for item {number}"} for number in item_numbers
+                ]})
+            if schema:
+                return json.dumps(sample_from_schema(schema))
+            return json.dumps({"text": "mock"})
+
+        return self.template.format(request_number=request_number, model=model,
+                                    prompt_chars=len(prompt), prompt_words=len(prompt.split()))
+
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    behavior = MockBehavior()
+
+    def log_message(self, format, *args):
+        """Keep the console quiet under load."""
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        match = ROUTE_RE.match(path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON payload", "status": "INVALID_ARGUMENT"}})
+            return
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown route {path}", "status": "NOT_FOUND"}})
+            return
+
+        request_number, status, latency = self.behavior.next_request()
+        time.sleep(latency)
+
+        if status == 429:
+            headers = {}
+            if self.behavior.retry_after is not None:
+                headers["Retry-After"] = str(self.behavior.retry_after)
+            self._send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted (mock)",
+                                            "status": "RESOURCE_EXHAUSTED"}}, headers)
+            return
+        if status != 200:
+            self._send_json(status, {"error": {"code": status, "message": "Internal error (mock)",
+                                               "status": "UNAVAILABLE" if status == 503 else "INTERNAL"}})
+            return
+
+        text = self.behavior.response_text(request_number, match.group("model"), body)
+        if match.group("method") == "generateContent":
+            self._send_json(200, self._candidate(text, finish=True))
+        else:
+            self._stream(text)
+
+    @staticmethod
+    def _candidate(text, finish):
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finish:
+            candidate["finishReason"] = "STOP"
+        return {"candidates": [candidate]}
+
+    def _stream(self, text):
+        """Send the text as server-sent events, a few words at a time."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        words = re.findall(r"\S+\s*", text) or [text]
+        step = self.behavior.chunk_words
+        for start in range(0, len(words), step):
+            chunk = "".join(words[start:start + step])
+            event = self._candidate(chunk, finish=start + step >= len(words))
+            self.wfile.write(b"data: " + json.dumps(event).encode("utf-8") + b"\r\n\r\n")
+            self.wfile.flush()
+            if start + step < len(words):
+                time.sleep(self.behavior.chunk_delay_ms / 1000.0)
+        self.close_connection = True
+
+def start_server(host="127.0.0.1", port=0, behavior=None):
+    """
+    Start the mock server in a background thread.
+
+    Args:
+        port: Port to listen on (0: any free port)
+        behavior: MockBehavior to use (defaults if omitted)
+
+    Returns:
+        The server; its generateContent URL is
+        f"http://{host}:{server.server_port}/v1/models/mock:generateContent"
+    """
+    handler = type("ConfiguredMockGeminiHandler", (MockGeminiHandler,), {"behavior": behavior or MockBehavior()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Local mock of the Gemini generateContent API')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', choices=['constant', 'uniform', 'exponential', 'lognormal'],
+                        default='constant', help='Latency distribution')
+    parser.add_argument('--latency-ms', type=float, default=200.0,
+                        help='Mean latency (median for lognormal) in milliseconds')
+    parser.add_argument('--latency-spread', type=float, default=0.5,
+                        help='Uniform: +/- fraction of the mean; lognormal: sigma')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='Share of requests answered with 500/503')
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds on 429 responses')
+    parser.add_argument('--template', type=str, default=DEFAULT_TEMPLATE,
+                        help='Response text ({request_number}, {model}, {prompt_chars}, {prompt_words})')
+    parser.add_argument('--chunk-words', type=int, default=3, help='Words per streamed event')
+    parser.add_argument('--chunk-delay-ms', type=float, default=50.0, help='Delay between streamed events')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for repeatable runs')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    behavior = MockBehavior(
+        latency=args.latency, latency_ms=args.latency_ms, latency_spread=args.latency_spread,
+        rate_429=args.rate_429, rate_5xx=args.rate_5xx, retry_after=args.retry_after,
+        template=args.template, chunk_words=args.chunk_words,
+        chunk_delay_ms=args.chunk_delay_ms, seed=args.seed
+    )
+    server = start_server(args.host, args.port, behavior)
+    print(f"Mock Gemini API listening on http://{args.host}:{server.server_port}")
+    print(f"export GEMINI_API_URL=http://{args.host}:{server.server_port}/v1/models/mock:generateContent")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\nServed {behavior.request_count} requests: {behavior.status_counts}")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Line-level cleanup of OCR text: boilerplate lines, whitespace and noise tokens.
+"""
+
+import re
+from collections import Counter
+import config
+
+WHITESPACE_RE = re.compile(r"[ \t\f\v]+")
+
+class OcrCleaner:
+    def __init__(self, boilerplate_ratio=None, min_frames=None, noise_pattern=None):
+        """
+        Initialize the cleaner.
+
+        Args:
+            boilerplate_ratio: Drop lines that appear in at least this share of frames
+            min_frames: Only detect boilerplate when the window has this many frames
+            noise_pattern: Regex for OCR noise tokens to remove (clocks, stray symbols)
+        """
+        self.boilerplate_ratio = (config.OCR_BOILERPLATE_RATIO
+                                  if boilerplate_ratio is None else boilerplate_ratio)
+        self.min_frames = config.OCR_BOILERPLATE_MIN_FRAMES if min_frames is None else min_frames
+        self.noise_re = re.compile(noise_pattern or config.OCR_NOISE_PATTERN, re.IGNORECASE)
+
+        self.last_stats = {"bytes_before": 0, "bytes_after": 0, "lines_dropped": 0, "reduction": 0.0}
+
+    def _clean_line(self, line):
+        """Remove noise tokens and collapse whitespace in one line."""
+        line = self.noise_re.sub(" ", line)
+        return WHITESPACE_RE.sub(" ", line).strip()
+
+    def clean(self, rows):
+        """
+        Clean the text of every OCR row in a window.
+
+        Lines are first normalized (noise removed, whitespace collapsed), then
+        any line found in most frames of the window (menu bars, tab titles,
+        taskbars) is dropped. Frames are counted by distinct content, so a
+        screen that simply didn't change is not mistaken for boilerplate.
+        Rows left without text are dropped too.
+
+        Args:
+            rows: Iterable of OCR data dictionaries
+
+        Returns:
+            A list of copies of the rows with cleaned text
+        """
+        frames = []
+        distinct_frames = set()
+        line_counts = Counter()
+        bytes_before = 0
+
+        for row in rows:
+            bytes_before += len(row['text'].encode("utf-8"))
+            lines = [self._clean_line(line) for line in row['text'].splitlines()]
+            lines = [line for line in lines if line]
+            frames.append((row, lines))
+
+            # Count each line once per distinct frame
+            frame_key = tuple(lines)
+            if frame_key not in distinct_frames:
+                distinct_frames.add(frame_key)
+                line_counts.update(set(lines))
+
+        boilerplate = set()
+        if len(distinct_frames) >= self.min_frames:
+            threshold = self.boilerplate_ratio * len(distinct_frames)
+            boilerplate = {line for line, count in line_counts.items() if count >= threshold}
+
+        cleaned = []
+        bytes_after = 0
+        lines_dropped = 0
+        for row, lines in frames:
+            kept = [line for line in lines if line not in boilerplate]
+            lines_dropped += len(lines) - len(kept)
+            if not kept:
+                continue
+            text = "\n".join(kept)
+            bytes_after += len(text.encode("utf-8"))
+            cleaned_row = dict(row)
+            cleaned_row['text'] = text
+            cleaned.append(cleaned_row)
+
+        self.last_stats = {
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "lines_dropped": lines_dropped,
+            "reduction": 1 - bytes_after / bytes_before if bytes_before else 0.0
+        }
+        return cleaned
@@ -0,0 +1,134 @@
+"""
+Persistent cursor for incremental reads of Screenpipe OCR data.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+class OcrCursor:
+    def __init__(self, path=None, name="default"):
+        """
+        Initialize a cursor that remembers the last processed OCR row.
+
+        The position is the ocr_text rowid rather than the frame id: Screenpipe
+        writes a frame's OCR row after the frame itself, so a frame whose text
+        arrives late still gets a rowid past the cursor and is not skipped.
+
+        Args:
+            path: JSON file the cursor position is saved to (None keeps it in memory only)
+            name: Key for this cursor inside the file, so several consumers can share one file
+        """
+        self.path = path
+        if self.path and self.path.startswith("~"):
+            self.path = str(Path(self.path).expanduser())
+        self.name = name
+        self.last_ocr_id = None
+        self.last_frame_id = None
+        self.last_timestamp = None
+
+        # Rolling window of rows already fetched through this cursor
+        self.window = deque()
+        self.window_seconds = 0
+        self._lock = threading.Lock()
+
+        self.load()
+
+    def load(self):
+        """Load the saved position from disk, if there is one."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f).get(self.name, {})
+            self.last_ocr_id = state.get("last_ocr_id")
+            self.last_frame_id = state.get("last_frame_id")
+            self.last_timestamp = state.get("last_timestamp")
+        except (OSError, ValueError) as e:
+            print(f"Could not load OCR cursor from {self.path}: {e}")
+
+    def save(self):
+        """Save the current position to disk."""
+        if not self.path:
+            return
+        try:
+            state = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    state = json.load(f)
+            state[self.name] = {
+                "last_ocr_id": self.last_ocr_id,
+                "last_frame_id": self.last_frame_id,
+                "last_timestamp": self.last_timestamp
+            }
+
+            # Write to a temp file first so a crash never leaves a half-written cursor
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except (OSError, ValueError) as e:
+            print(f"Could not save OCR cursor to {self.path}: {e}")
+
+    def advance(self, rows):
+        """Move the cursor past the given rows and save the new position."""
+        if not rows:
+            return
+        last = max(rows, key=lambda row: row["ocr_id"])
+        if self.last_ocr_id is None or last["ocr_id"] > self.last_ocr_id:
+            self.last_ocr_id = last["ocr_id"]
+            self.last_frame_id = last["frame_id"]
+            self.last_timestamp = last["timestamp"]
+            self.save()
+
+    def reset(self):
+        """Forget the saved position and the rolling window."""
+        self.last_ocr_id = None
+        self.last_frame_id = None
+        self.last_timestamp = None
+        self.window.clear()
+        self.window_seconds = 0
+        self.save()
+
+    def update_window(self, seconds_ago, read_seen, read_new):
+        """
+        Bring the rolling window up to date and return its rows from the last seconds_ago seconds.
+
+        On the first call (after a restart too) or when a wider window is
+        asked for, the buffer is refilled with read_seen(seconds) - the rows
+        up to the saved position - and everything past the position comes
+        from read_new(seconds), which is expected to advance the cursor.
+
+        Args:
+            seconds_ago: Size of the window wanted (in seconds)
+            read_seen: Callable(seconds) returning rows at or before the saved position
+            read_new: Callable(seconds) returning rows past the saved position
+
+        Returns:
+            The buffered rows of the last seconds_ago seconds, oldest first
+        """
+        with self._lock:
+            if seconds_ago > self.window_seconds:
+                self.window = deque(read_seen(seconds_ago))
+                self.window_seconds = seconds_ago
+
+            order = lambda row: (row["timestamp"], row["frame_id"])
+            new_rows = sorted(read_new(self.window_seconds), key=order)
+            if new_rows:
+                late = self.window and order(new_rows[0]) < order(self.window[-1])
+                self.window.extend(new_rows)
+                if late:
+                    # OCR that arrived late belongs before rows already buffered
+                    self.window = deque(sorted(self.window, key=order))
+
+            # Evict rows that have aged out of the buffered window
+            threshold = int(time.time()) - self.window_seconds
+            while self.window and self.window[0]["timestamp"] <= threshold:
+                self.window.popleft()
+
+            threshold = int(time.time()) - seconds_ago
+            return [row for row in self.window if row["timestamp"] > threshold]
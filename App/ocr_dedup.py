@@ -0,0 +1,185 @@
+"""
+Exact and near-duplicate elimination for OCR frames.
+"""
+
+import hashlib
+import re
+import config
+
+WORD_RE = re.compile(r"\w+")
+
+def _hash64(value):
+    """Stable 64-bit hash of a string."""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace so trivial differences don't matter."""
+    return " ".join(text.lower().split())
+
+def content_hash(text):
+    """Hash of the normalized text, used to merge exact duplicates."""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+def content_fingerprint(rows):
+    """
+    Fingerprint the content of OCR rows, ignoring when and in what order it was seen.
+    
+    Returns:
+        (digest, line_hashes): a hex digest of the distinct normalized lines,
+        and the set of their 64-bit hashes (hex) for similarity checks
+    """
+    line_hashes = {
+        line_hash(line)
+        for row in rows
+        for line in row['text'].splitlines()
+        if line.strip()
+    }
+    digest = hashlib.sha1(" ".join(sorted(line_hashes)).encode("utf-8")).hexdigest()
+    return digest, line_hashes
+
+def line_hash(line):
+    """64-bit hash (hex) of a normalized line, as used in content fingerprints."""
+    return format(_hash64(normalize_text(line)), "016x")
+
+def select_lines(text, line_hashes):
+    """
+    Pick lines out of (formatted) text by content.
+
+    Returns:
+        The lines whose line_hash() is in line_hashes, in order and each once,
+        joined by newlines
+    """
+    selected = []
+    seen = set()
+    for line in text.splitlines():
+        key = line_hash(line)
+        if key in line_hashes and key not in seen:
+            seen.add(key)
+            selected.append(line.strip())
+    return "\n".join(selected)
+
+def simhash(text, shingle_size=3):
+    """
+    64-bit SimHash of the text's word shingles.
+
+    Texts that differ in a few words (a clock, a counter, a cursor) end up a
+    few bits apart, so near-duplicates can be found by Hamming distance.
+    """
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return 0
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        h = _hash64(shingle)
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def hamming_distance(a, b):
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+class FrameDeduplicator:
+    def __init__(self, max_distance=None, shingle_size=None):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            max_distance: SimHash bits two frames may differ by and still be merged
+            shingle_size: Words per shingle used for the SimHash
+        """
+        self.max_distance = config.OCR_DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+        self.shingle_size = shingle_size or config.OCR_DEDUP_SHINGLE_SIZE
+
+        # The fingerprint is split into bands; with max_distance < bands, two
+        # near-duplicates always share at least one band exactly (pigeonhole)
+        self.bands = max(4, self.max_distance + 1)
+        self.band_bits = 64 // self.bands
+
+        self.last_stats = {"frames": 0, "groups": 0, "dedup_ratio": 1.0}
+
+    def _band_keys(self, fingerprint, app_name):
+        """Lookup keys for each band of a fingerprint."""
+        mask = (1 << self.band_bits) - 1
+        return [
+            (app_name, band, fingerprint >> (band * self.band_bits) & mask)
+            for band in range(self.bands)
+        ]
+
+    def dedupe(self, rows):
+        """
+        Merge exact and near-duplicate OCR rows.
+
+        Rows are only merged with rows from the same app. Each merged group
+        keeps the metadata and text of its most recent frame, plus first_seen,
+        last_seen and frame_count.
+
+        Args:
+            rows: Iterable of OCR data dictionaries, oldest first
+
+        Returns:
+            A list of group dictionaries ordered by last_seen
+        """
+        groups = []
+        by_hash = {}
+        by_band = {}
+        frames = 0
+
+        for row in rows:
+            frames += 1
+            text = row['text']
+            app_name = row.get('app_name')
+            key = (app_name, content_hash(text))
+
+            group = by_hash.get(key)
+            fingerprint = None
+            if group is None:
+                fingerprint = simhash(text, self.shingle_size)
+                band_keys = self._band_keys(fingerprint, app_name)
+                for band_key in band_keys:
+                    for candidate in by_band.get(band_key, ()):
+                        if hamming_distance(candidate['fingerprint'], fingerprint) <= self.max_distance:
+                            group = candidate
+                            break
+                    if group is not None:
+                        break
+
+            if group is None:
+                group = dict(row)
+                group['first_seen'] = row['timestamp']
+                group['last_seen'] = row['timestamp']
+                group['frame_count'] = 1
+                group['fingerprint'] = fingerprint
+                groups.append(group)
+                for band_key in band_keys:
+                    by_band.setdefault(band_key, []).append(group)
+            else:
+                # Keep the newest version of the text and its metadata
+                first_seen = group['first_seen']
+                frame_count = group['frame_count']
+                group.update(row)
+                group['first_seen'] = min(first_seen, row['timestamp'])
+                group['last_seen'] = max(group['last_seen'], row['timestamp'])
+                group['frame_count'] = frame_count + 1
+            by_hash[key] = group
+
+        for group in groups:
+            del group['fingerprint']
+        groups.sort(key=lambda group: group['last_seen'])
+
+        self.last_stats = {
+            "frames": frames,
+            "groups": len(groups),
+            "dedup_ratio": frames / len(groups) if groups else 1.0
+        }
+        return groups
@@ -0,0 +1,142 @@
+"""
+Helpers for Screenpipe's word-level OCR data (ocr_text.text_json).
+"""
+
+import json
+
+def _number(value, default=None):
+    """Convert a JSON value (Tesseract stores numbers as strings) to float."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def confidence_scale(items):
+    """
+    Factor that brings a document's confidences to 0-100.
+
+    The scale is decided once per document, not per word: Tesseract ("conf")
+    always reports percentages, so a word at 1% stays at 1. Engines that use
+    "confidence" report fractions when none of their values exceed 1.
+    """
+    if any("conf" in item for item in items):
+        return 1.0
+    values = [_number(item.get("confidence")) for item in items]
+    values = [value for value in values if value is not None]
+    if values and all(0 <= value <= 1 for value in values):
+        return 100.0
+    return 1.0
+
+def parse_words(text_json):
+    """
+    Parse text_json into a list of word tuples.
+
+    Handles the Tesseract layout (text, conf, left/top/width/height,
+    block_num/par_num/line_num) as well as engines that use "confidence" and
+    a "bounding_box" object.
+
+    Args:
+        text_json: The raw JSON string from ocr_text.text_json
+
+    Returns:
+        A list of (text, confidence 0-100, (left, top, width, height) or None, line key),
+        or None if the JSON is missing or unreadable
+    """
+    if not text_json:
+        return None
+    try:
+        items = json.loads(text_json)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(items, list):
+        return None
+
+    items = [item for item in items if isinstance(item, dict)]
+    scale = confidence_scale(items)
+
+    words = []
+    for item in items:
+        text = str(item.get("text") or "").strip()
+        if not text:
+            continue
+
+        confidence = _number(item.get("conf", item.get("confidence")))
+        confidence = 100.0 if confidence is None else confidence * scale
+
+        box = item.get("bounding_box") if isinstance(item.get("bounding_box"), dict) else item
+        left = _number(box.get("left", box.get("x")))
+        top = _number(box.get("top", box.get("y")))
+        width = _number(box.get("width"), 0.0)
+        height = _number(box.get("height"), 0.0)
+        bbox = (left, top, width, height) if left is not None and top is not None else None
+
+        if "line_num" in item:
+            line_key = (item.get("block_num"), item.get("par_num"), item.get("line_num"))
+        else:
+            line_key = None
+        words.append((text, confidence, bbox, line_key))
+    return words
+
+FOCUSED = "focused"  # region that keeps only the focused window's frames
+
+def parse_region(value):
+    """
+    Parse a region setting.
+
+    Args:
+        value: "" (no region), "focused", or "left,top,width,height"
+
+    Returns:
+        None, FOCUSED or a (left, top, width, height) tuple
+    """
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    if value == FOCUSED:
+        return FOCUSED
+    try:
+        left, top, width, height = (float(part) for part in value.split(","))
+    except ValueError:
+        print(f"Ignoring invalid OCR region {value!r} (expected 'focused' or 'left,top,width,height')")
+        return None
+    return (left, top, width, height)
+
+def in_region(bbox, region):
+    """Return True if the centre of bbox lies inside region (left, top, width, height)."""
+    if bbox is None:
+        return False
+    left, top, width, height = bbox
+    center_x = left + width / 2
+    center_y = top + height / 2
+    region_left, region_top, region_width, region_height = region
+    return (region_left <= center_x <= region_left + region_width and
+            region_top <= center_y <= region_top + region_height)
+
+def words_to_text(words, min_confidence=0, region=None):
+    """
+    Rebuild text from parsed words, keeping only confident words in the region.
+
+    Args:
+        words: Output of parse_words
+        min_confidence: Drop words below this confidence (0-100)
+        region: Optional (left, top, width, height) the word centres must fall in
+
+    Returns:
+        The text, one OCR line per line
+    """
+    lines = []
+    current_key = object()
+    for text, confidence, bbox, line_key in words:
+        if confidence < min_confidence:
+            continue
+        if region is not None and not in_region(bbox, region):
+            continue
+        if line_key is None or line_key != current_key:
+            lines.append([])
+            current_key = line_key
+        lines[-1].append(text)
+
+    if all(word[3] is None for word in words):
+        # No line information: everything is one run of words
+        return " ".join(word for line in lines for word in line)
+    return "\n".join(" ".join(line) for line in lines)
@@ -0,0 +1,155 @@
+"""
+Sidecar SQLite FTS5 index over Screenpipe OCR history.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS ocr_fts USING fts5(
+    text,
+    app_name,
+    browser_url,
+    window_name UNINDEXED,
+    timestamp UNINDEXED,
+    frame_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TABLE IF NOT EXISTS index_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+def _to_epoch(value):
+    """Accept epoch seconds or a datetime and return epoch seconds."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+def build_match_query(query):
+    """
+    Turn free text into an FTS5 query over the text column.
+
+    Every word becomes a quoted term (so punctuation and FTS5 operators in the
+    input can't break the query) and all terms must match.
+    """
+    terms = [term.replace('"', '""') for term in query.split()]
+    if not terms:
+        return None
+    return "text : (" + " ".join(f'"{term}"' for term in terms) + ")"
+
+class OcrSearchIndex:
+    def __init__(self, index_path):
+        """
+        Open (or create) the full-text index.
+
+        Args:
+            index_path: Path to the sidecar SQLite database
+        """
+        self.index_path = index_path
+        if self.index_path.startswith("~"):
+            self.index_path = str(Path(self.index_path).expanduser())
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+
+        self.conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the index database."""
+        with self._lock:
+            self.conn.close()
+
+    def _state(self, key):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM index_state WHERE key = ?", (key,)
+            ).fetchone()
+        return row['value'] if row else None
+
+    def last_frame_id(self):
+        """Return the id of the newest frame already in the index."""
+        return self._state('last_frame_id') or 0
+
+    def last_ocr_id(self):
+        """Return the newest ocr_text rowid already in the index (None for older indexes)."""
+        return self._state('last_ocr_id')
+
+    def add_rows(self, rows, last_ocr_id):
+        """
+        Add OCR rows to the index and record how far it has caught up.
+
+        Args:
+            rows: OCR data dictionaries (with frame_id)
+            last_ocr_id: Newest ocr_text rowid covered by this batch, including empty rows
+        """
+        with self._lock:
+            with self.conn:
+                self.conn.executemany(
+                    """
+                    INSERT INTO ocr_fts (text, app_name, browser_url, window_name, timestamp, frame_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (row['text'], row['app_name'], row['browser_url'],
+                         row['window_name'], row['timestamp'], row['frame_id'])
+                        for row in rows
+                    ]
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO index_state (key, value) VALUES ('last_ocr_id', ?)",
+                    (last_ocr_id,)
+                )
+
+    def search(self, query, since=None, until=None, app=None, limit=50):
+        """
+        Search indexed OCR text.
+
+        Args:
+            query: Words to look for (all must match)
+            since: Only frames at or after this time (epoch seconds or datetime)
+            until: Only frames at or before this time (epoch seconds or datetime)
+            app: Optional filter for specific applications
+            limit: Maximum number of results
+
+        Returns:
+            A list of dictionaries with frame_id, timestamp, app_name,
+            window_name, browser_url and a highlighted snippet, best match first
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        sql = """
+            SELECT frame_id, timestamp, app_name, window_name, browser_url,
+                   snippet(ocr_fts, 0, '[', ']', '...', 12) AS snippet
+            FROM ocr_fts
+            WHERE ocr_fts MATCH ?
+        """
+        params = [match]
+
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            params.append(_to_epoch(since))
+        if until is not None:
+            sql += " AND timestamp <= ?"
+            params.append(_to_epoch(until))
+        if app:
+            sql += " AND app_name LIKE ?"
+            params.append(f"%{app}%")
+
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
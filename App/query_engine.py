@@ -2,46 +2,292 @@
 Query engine that coordinates between Screenpipe and LLaMA.
 """
 
+import time
 import config
+from single_flight import SingleFlight
+from dataclasses import replace
+from app_analysis import AppAnalysis
+import heuristic_classifier
+from app_classifier import AppClassifier, normalize_app
+from ocr_dedup import select_lines
+from title_normalizer import window_key
+from time_summaries import infer_horizon
 
 class QueryEngine:
-    def __init__(self, screenpipe_connector, llama_client, time_window=300):
-        """Initialize the query engine."""
+    def __init__(self, screenpipe_connector, llama_client, time_window=300, classifier=None,
+                 analysis_store=None, summarizer=None):
+        """
+        Initialize the query engine.
+        
+        Args:
+            classifier: AppClassifier for the local fast path (a new, empty one
+                if omitted and LOCAL_CLASSIFIER_ENABLED)
+            analysis_store: AnalysisStore reused while the screen is unchanged
+                (no analysis cache if omitted)
+            summarizer: TimeBucketSummarizer whose summaries answer questions
+                about more than time_window (recent text only if omitted)
+        """
         self.screenpipe = screenpipe_connector
         self.llama = llama_client
         self.time_window = time_window
+        self._in_flight = SingleFlight()
+        # (child id, app, window key) -> {"line_hashes", "analysis", "revisions"} of the last analysis
+        self.previous_contexts = {}
+        if classifier is None and config.LOCAL_CLASSIFIER_ENABLED:
+            classifier = AppClassifier()
+        self.classifier = classifier
+        self.analysis_store = analysis_store
+        self.summarizer = summarizer
+        
+    def process_query(self, query, seconds_ago=None):
+        """
+        Process a user query against recent screen content.
         
-    def process_query(self, query):
-        """Process a user query against recent screen content."""
-        # Get recent OCR text
-        ocr_text = self.screenpipe.get_recent_ocr_text(self.time_window)
+        Args:
+            seconds_ago: Period the question is about (default: inferred from
+                phrases like "this afternoon", otherwise time_window)
+        """
+        ocr_text = self._query_context(query, seconds_ago)
         
         if not ocr_text:
             return "No screen content found in the specified time window."
             
-        # Truncate OCR text if it's too long
-        if len(ocr_text) > config.MAX_OCR_TEXT_LENGTH:
-            ocr_text = ocr_text[:config.MAX_OCR_TEXT_LENGTH] + "...[truncated]"
-            
         # Send to LLaMA
         response = self.llama.query(ocr_text, query)
         return response
         
-    def analyze_current_app(self):
-        """Analyze the current app being used based on screen content."""
-        # Get recent OCR text
-        ocr_text = self.screenpipe.get_recent_ocr_text(self.time_window)
+    def process_query_stream(self, query, seconds_ago=None):
+        """Like process_query, but yield the response in chunks as Gemini generates it."""
+        ocr_text = self._query_context(query, seconds_ago)
         
         if not ocr_text:
-            return "No screen content found in the specified time window."
+            yield "No screen content found in the specified time window."
+            return
             
-        # Truncate OCR text if it's too long
-        if len(ocr_text) > config.MAX_OCR_TEXT_LENGTH:
-            ocr_text = ocr_text[:config.MAX_OCR_TEXT_LENGTH] + "...[truncated]"
+        yield from self.llama.query_stream(ocr_text, query)
         
-        # Get app name from Screenpipe if available
+    def _query_context(self, query, seconds_ago=None):
+        """
+        Screen text to send along with a user query.
+        
+        For a question about more than time_window, summaries of the earlier
+        part of the period are sent along with the recent raw text.
+        """
+        if config.RELEVANCE_RANKING_ENABLED:
+            # Send the parts of the window that best match the question, so a
+            # long time window costs the same number of tokens as a short one
+            ocr_text = self.screenpipe.get_relevant_ocr_text(
+                query, self.time_window, max_length=config.MAX_OCR_TEXT_LENGTH
+            )
+        else:
+            # Get recent OCR text, formatted only up to the prompt budget
+            ocr_text = self.screenpipe.get_recent_ocr_text(
+                self.time_window, max_length=config.MAX_OCR_TEXT_LENGTH
+            )
+        
+        if not self.summarizer:
+            return ocr_text
+        horizon = seconds_ago or infer_horizon(query)
+        if not horizon or horizon <= self.time_window:
+            return ocr_text
+        
+        now = time.time()
+        summaries = self.summarizer.build_context(now - horizon, now - self.time_window)
+        if not summaries:
+            print(f"No summaries of the earlier part of this period yet; answering from "
+                  f"the last {self.time_window // 60} minutes of screen text only.")
+            return ocr_text
+        return (f"Summaries of earlier activity:\n{summaries}\n\n"
+                f"Screen text from the last {self.time_window // 60} minutes:\n{ocr_text}")
+        
+    def analyze_current_app(self, child_id=None, child_age=None, blocking=None):
+        """
+        Analyze the current app being used based on screen content.
+        
+        Callers arriving while an analysis is already running (the monitor
+        and dashboard polls sharing this engine) wait for it and get its result.
+        
+        Args:
+            child_id: Child the analysis is for; incremental analyses follow
+                each child's windows separately (None: any child)
+            child_age: Age of that child (None: minors in general)
+            blocking: Wait for the rate limiter (None: as the Gemini client
+                does); a caller that joins a running analysis gets its result
+        
+        Returns:
+            An AppAnalysis (with error set if no analysis could be made)
+        """
+        return self._in_flight.do(("analyze_current_app", self.time_window, child_id, child_age),
+                                  self._analyze_current_app, child_id, child_age, blocking)
+        
+    def _analyze_current_app(self, child_id=None, child_age=None, blocking=None):
+        """Classify the current app locally if it is well known, otherwise analyze the screen."""
         app_info = self.screenpipe.get_current_app_info()
         app_name = app_info.get("app_name", "Unknown")
+        
+        # Known apps, sites and windows are answered without reading the screen
+        if self.classifier:
+            analysis = self.classifier.classify(
+                app_name, app_info.get("window_name"), app_info.get("browser_url")
+            )
+            if analysis:
+                return analysis
+        
+        # Get recent OCR text, formatted only up to the prompt budget, and its fingerprint
+        ocr_text, fingerprint = self.screenpipe.get_recent_ocr_context(
+            self.time_window, max_length=config.MAX_OCR_TEXT_LENGTH
+        )
+        
+        if not ocr_text or not fingerprint:
+            return AppAnalysis.from_error("No screen content found in the specified time window.")
+        
+        return self.analyze_screen(ocr_text, fingerprint, app_info, child_id, child_age, blocking)
+        
+    def analyze_screen(self, ocr_text, fingerprint, app_info, child_id=None, child_age=None,
+                       blocking=None):
+        """
+        Analyze screen content that has already been read.
+        
+        The stored analysis is reused if the screen has not changed at all.
+        If this child's window was analyzed before (or, after a restart, the
+        store holds an analysis of a similar screen of it), only the lines
+        added since are sent, with the previous verdict to confirm or revise,
+        so the prompt follows the amount of change rather than the window
+        size. Otherwise the whole screen text is analyzed.
+        
+        Args:
+            ocr_text: Formatted screen text
+            fingerprint: Its content fingerprint (see get_recent_ocr_context)
+            app_info: Current app info (app_name, window_name, browser_url)
+            child_id: Child the analysis is for (None: any child)
+            child_age: Age of that child (None: minors in general)
+            blocking: Wait for the rate limiter (None: as the Gemini client does)
+            
+        Returns:
+            An AppAnalysis
+        """
+        app_name = app_info.get("app_name", "Unknown")
+        window_name = app_info.get("window_name")
+        llama = self.llama if blocking is None else self.llama.with_blocking(blocking)
+        
+        # An unchanged screen keeps its stored analysis
+        if self.analysis_store:
+            analysis = self.analysis_store.lookup(app_name, window_name, fingerprint)
+            if analysis:
+                return analysis
+        
+        # Don't wait on Gemini while the circuit breaker says it is down
+        if not llama.is_available():
+            return self._fallback_analysis(ocr_text, app_info)
+        
+        key = self._context_key(child_id, app_info)
+        previous = None
+        if config.INCREMENTAL_ANALYSIS_ENABLED:
+            previous = self.previous_contexts.get(key)
+            if previous is None and self.analysis_store:
+                # A similar screen analyzed earlier: check its new lines against that verdict
+                nearest = self.analysis_store.nearest(app_name, window_name, fingerprint)
+                if nearest:
+                    previous = {"analysis": nearest[0], "line_hashes": nearest[1], "revisions": 0}
+        revisions = 0
+        analysis = None
+        if previous:
+            added = fingerprint[1] - previous["line_hashes"]
+            if not added:
+                # Lines only scrolled out of the time window: the verdict stands
+                return replace(previous["analysis"], source="stored")
+            if (previous["revisions"] < config.INCREMENTAL_MAX_REVISIONS
+                    and len(added) <= config.INCREMENTAL_MAX_CHANGE * len(fingerprint[1])):
+                new_text = select_lines(ocr_text, added)
+                if new_text:
+                    print(f"Revising the analysis of {app_name} from {len(added)} new lines.")
+                    analysis = llama.revise_analysis(
+                        new_text, previous["analysis"], child_age=child_age,
+                        app_name=app_name, window_name=window_name or ""
+                    )
+                    revisions = previous["revisions"] + 1
+        
+        if analysis is None:
+            # Send to LLaMA
+            analysis = llama.analyze_app(
+                ocr_text,
+                child_age=child_age,
+                app_name=app_name,
+                window_name=window_name or ""
+            )
+        
+        if not analysis.ok:
+            print(f"Analysis failed ({analysis.error}); using a fallback.")
+            return self._fallback_analysis(ocr_text, app_info)
+        
+        self.remember_analysis(child_id, app_info, fingerprint, analysis, revisions)
+        if self.classifier:
+            self.classifier.learn(app_name, window_name, app_info.get("browser_url"), analysis)
+        if self.analysis_store:
+            self.analysis_store.save(app_name, window_name, app_info.get("browser_url"), fingerprint, analysis)
+        return analysis
+        
+    @staticmethod
+    def _context_key(child_id, app_info):
+        app_name = app_info.get("app_name")
+        return (child_id, normalize_app(app_name), window_key(app_name, app_info.get("window_name")))
+        
+    def has_previous_analysis(self, child_id, app_info):
+        """True if this child's current window has been analyzed before (see analyze_screen)."""
+        return self._context_key(child_id, app_info) in self.previous_contexts
+        
+    def remember_analysis(self, child_id, app_info, fingerprint, analysis, revisions=0):
+        """
+        Record a Gemini analysis of a child's window, for incremental analysis next time.
+        
+        Args:
+            revisions: Incremental revisions since the last full analysis
+        """
+        key = self._context_key(child_id, app_info)
+        self.previous_contexts.pop(key, None)
+        self.previous_contexts[key] = {
+            "line_hashes": fingerprint[1],
+            "analysis": analysis,
+            "revisions": revisions
+        }
+        # Forget the least recently analyzed windows
+        while len(self.previous_contexts) > config.INCREMENTAL_MAX_CONTEXTS:
+            self.previous_contexts.pop(next(iter(self.previous_contexts)))
+        
+    def _fallback_analysis(self, ocr_text, app_info):
+        """
+        Answer without Gemini: the app's most recent stored analysis, or a local heuristic.
+        
+        Stored analyses outlive restarts, so a known app keeps a real verdict
+        through an outage.
+        
+        Returns:
+            An AppAnalysis with source "cached" or "heuristic"
+        """
+        app_name = app_info.get("app_name", "Unknown")
+        if self.analysis_store:
+            previous = self.analysis_store.latest(app_name, app_info.get("window_name"))
+            if previous:
+                return previous
+        return heuristic_classifier.classify(
+            app_name, app_info.get("window_name"), app_info.get("browser_url"), ocr_text
+        )
+        
+    def analyze_current_app_stream(self):
+        """
+        Like analyze_current_app, but yield a readable report in chunks as Gemini generates it.
+        
+        Streams are meant for people watching the answer arrive, so they ask
+        for the free-text report rather than the JSON analysis, and are not
+        coalesced.
+        """
+        ocr_text, app_info = self._analysis_context()
+        
+        if not ocr_text:
+            yield "No screen content found in the specified time window."
+            return
+        
+        app_name = app_info.get("app_name", "Unknown")
         window_name = app_info.get("window_name", "")
         
         # Create a specialized prompt for app analysis
@@ -62,6 +308,17 @@ If the app name is clearly visible in the OCR text, use that. Otherwise, make yo
 Current app name according to system: {app_name} {window_name}
         """
         
-        # Send to LLaMA
-        response = self.llama.query(ocr_text, analysis_prompt)
-        return response 
\ No newline at end of file
+        yield from self.llama.query_stream(ocr_text, analysis_prompt)
+        
+    def _analysis_context(self):
+        """Screen text and current app info for an analysis ((None, None) if nothing is on screen)."""
+        # Get recent OCR text, formatted only up to the prompt budget
+        ocr_text = self.screenpipe.get_recent_ocr_text(
+            self.time_window, max_length=config.MAX_OCR_TEXT_LENGTH
+        )
+        
+        if not ocr_text:
+            return None, None
+        
+        # Get app name from Screenpipe if available
+        return ocr_text, self.screenpipe.get_current_app_info()
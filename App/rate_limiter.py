@@ -0,0 +1,180 @@
+"""
+Token-bucket rate limiter shared by every process through a SQLite file.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS daily_usage (
+    name TEXT NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (name, day)
+);
+"""
+
+class RateLimitExceeded(Exception):
+    """Raised when a request can't be made now; retry_after is in seconds (None: not today)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucketLimiter:
+    def __init__(self, path=None, name="gemini", per_minute=None, per_day=None):
+        """
+        Open (or create) the shared limiter state.
+
+        The per-minute budget is a token bucket holding up to per_minute tokens
+        and refilling continuously; the daily budget is a counter per calendar
+        day. Both live in one SQLite file and are updated inside an IMMEDIATE
+        transaction, so threads and processes draw from the same budget.
+
+        Args:
+            path: Path to the limiter SQLite database
+            name: Budget name (one file can hold several)
+            per_minute: Requests allowed per minute (also the burst size)
+            per_day: Requests allowed per calendar day
+        """
+        self.path = path or config.GEMINI_RATE_LIMIT_PATH
+        if self.path.startswith("~"):
+            self.path = str(Path(self.path).expanduser())
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.name = name
+        self.per_minute = per_minute or config.GEMINI_REQUESTS_PER_MINUTE
+        self.per_day = per_day or config.GEMINI_DAILY_LIMIT
+
+        self.conn = sqlite3.connect(self.path, timeout=config.SCREENPIPE_BUSY_TIMEOUT,
+                                    check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the limiter database."""
+        with self._lock:
+            self.conn.close()
+
+    def try_acquire(self):
+        """
+        Take one request from the budget without waiting.
+
+        Returns:
+            0.0 if the request may go ahead, otherwise the seconds until a
+            token is available
+
+        Raises:
+            RateLimitExceeded: If today's budget is used up
+        """
+        now = time.time()
+        today = datetime.now().date().isoformat()
+        rate = self.per_minute / 60.0
+
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT count FROM daily_usage WHERE name = ? AND day = ?",
+                    (self.name, today)
+                ).fetchone()
+                used_today = row[0] if row else 0
+                if used_today >= self.per_day:
+                    raise RateLimitExceeded(
+                        f"Daily limit of {self.per_day} requests reached. Please try again tomorrow."
+                    )
+
+                row = self.conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is None:
+                    tokens = float(self.per_minute)
+                else:
+                    tokens = min(float(self.per_minute), row[0] + max(0.0, now - row[1]) * rate)
+
+                if tokens < 1:
+                    # Store the refill so far; nothing is taken
+                    wait = (1 - tokens) / rate
+                else:
+                    tokens -= 1
+                    wait = 0.0
+                    self.conn.execute(
+                        """
+                        INSERT INTO daily_usage (name, day, count) VALUES (?, ?, 1)
+                        ON CONFLICT (name, day) DO UPDATE SET count = count + 1
+                        """,
+                        (self.name, today)
+                    )
+                    # Old days are no longer needed
+                    self.conn.execute(
+                        "DELETE FROM daily_usage WHERE name = ? AND day < ?", (self.name, today)
+                    )
+
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, tokens, now)
+                )
+                self.conn.execute("COMMIT")
+                return wait
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def acquire(self, blocking=True, timeout=None):
+        """
+        Take one request from the budget.
+
+        Args:
+            blocking: Wait for a token; if False, raise instead of waiting
+            timeout: Longest time to wait in seconds (None: as long as needed)
+
+        Raises:
+            RateLimitExceeded: If the daily budget is used up, or a token isn't
+                available without waiting (non-blocking) or within the timeout;
+                retry_after holds the expected wait
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            if not blocking or (deadline is not None and time.monotonic() + wait > deadline):
+                raise RateLimitExceeded(
+                    f"Rate limit reached. Try again in {wait:.1f} seconds.", retry_after=wait
+                )
+            print(f"Rate limit approached. Waiting {wait:.1f} seconds...")
+            time.sleep(wait)
+
+    def get_usage(self):
+        """Return the requests used today and the tokens currently in the bucket."""
+        now = time.time()
+        today = datetime.now().date().isoformat()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT count FROM daily_usage WHERE name = ? AND day = ?", (self.name, today)
+            ).fetchone()
+            used_today = row[0] if row else 0
+            row = self.conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+        if row is None:
+            tokens = float(self.per_minute)
+        else:
+            tokens = min(float(self.per_minute), row[0] + max(0.0, now - row[1]) * self.per_minute / 60.0)
+        return {
+            "used_today": used_today,
+            "daily_limit": self.per_day,
+            "tokens": tokens,
+            "per_minute": self.per_minute
+        }
@@ -0,0 +1,176 @@
+"""
+Persistent SQLite cache of LLM responses with TTL and LRU eviction.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+"""
+
+# Clock times on screen (taskbar clocks, chat timestamps) change between otherwise identical screens
+CLOCK_RE = re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\b")
+# Time labels the formatter and the summarizer put in front of screen text stay exact
+LABEL_RE = re.compile(r"(^\[[^\]\n]*\]|\(on screen [^)\n]*\))", re.MULTILINE)
+WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_context(text):
+    """
+    Reduce screen text to the parts that affect the answer (for cache keys).
+
+    Clock times inside the captured text are dropped and case and whitespace
+    are folded; time labels added around the text are kept as they are.
+    """
+    parts = LABEL_RE.split(text or "")
+    for index in range(0, len(parts), 2):
+        parts[index] = CLOCK_RE.sub(" ", parts[index]).lower()
+    return WHITESPACE_RE.sub(" ", "".join(parts)).strip()
+
+def make_key(model, context, instructions, settings):
+    """
+    Hash a request into a cache key.
+
+    Args:
+        model: Model (endpoint) the request goes to
+        context: Screen text sent with the request (normalized)
+        instructions: The rest of the prompt, including the user's question (kept exact)
+        settings: Generation settings (temperature, token limit, safety settings)
+    """
+    material = json.dumps(
+        {"model": model, "context": normalize_context(context),
+         "instructions": instructions, "settings": settings},
+        sort_keys=True
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    def __init__(self, path=None, ttl=None, max_entries=None, max_bytes=None):
+        """
+        Open (or create) the response cache.
+
+        Args:
+            path: Path to the cache SQLite database
+            ttl: Seconds a response stays valid
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses
+        """
+        self.path = path or config.LLM_CACHE_PATH
+        if self.path.startswith("~"):
+            self.path = str(Path(self.path).expanduser())
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.ttl = config.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = config.LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+        # Shared by the monitor, the dashboard and the updater processes
+        self.conn = sqlite3.connect(self.path, timeout=config.SCREENPIPE_BUSY_TIMEOUT,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def close(self):
+        """Close the cache database."""
+        with self._lock:
+            self.conn.close()
+
+    def get(self, key):
+        """Return the cached response for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                    (now, key)
+                )
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        """Store a response and evict expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used, hits)
+                    VALUES (?, ?, ?, ?, ?, 0)
+                    """,
+                    (key, response, len(response.encode("utf-8")), now, now)
+                )
+                self._evict_locked(now)
+
+    def _evict_locked(self, now):
+        """Drop expired entries, then the least recently used ones over the limits."""
+        evicted = self.conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount
+
+        count, total = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count > self.max_entries or total > self.max_bytes:
+            # Walk from the least recently used entry until both limits are met
+            doomed = []
+            for key, size in self.conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_used ASC"
+            ):
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                count -= 1
+                total -= size
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            evicted += len(doomed)
+
+        self.evictions += evicted
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM responses")
+
+    def get_stats(self):
+        """Return hit/miss/eviction counters and the current size of the cache."""
+        with self._lock:
+            entries, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": total
+            }
@@ -2,30 +2,203 @@
 Connector for retrieving data from Screenpipe's SQLite database.
 """
 
+import io
+import random
 import sqlite3
+import threading
 import time
+from collections import OrderedDict
+from itertools import islice
 from pathlib import Path
 import config
+from context_ranker import BM25Ranker
+from db_pool import ReadOnlyConnectionPool
+from ocr_cleanup import OcrCleaner
+from ocr_dedup import FrameDeduplicator, content_fingerprint
+import ocr_json
+from ocr_search_index import OcrSearchIndex
+
+# Queries are kept as constants so every call reuses the same prepared statement
+OCR_COLUMNS = """
+    ocr_text.rowid AS ocr_id,
+    frames.id AS frame_id,
+    frames.timestamp, 
+    ocr_text.text, 
+    frames.app_name, 
+    frames.window_name,
+    frames.browser_url,
+    frames.focused
+"""
+
+CURRENT_APP_QUERY = """
+    SELECT app_name, window_name, browser_url
+    FROM frames
+    WHERE focused = 1
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
+
+def _is_busy_error(error):
+    """Return True if a SQLite error means another connection holds a lock."""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
 
 class ScreenpipeConnector:
-    def __init__(self, db_path=None):
-        """Initialize the Screenpipe connector with the database path."""
+    def __init__(self, db_path=None, cursor=None):
+        """
+        Initialize the Screenpipe connector with the database path.
+
+        Args:
+            db_path: Path to the Screenpipe SQLite database
+            cursor: Optional OcrCursor; when set, get_recent_ocr_text only
+                fetches frames added since the previous call
+        """
         self.db_path = db_path or config.SCREENPIPE_DB_PATH
+        self.cursor = cursor
         
         # Expand ~ to user's home directory if present
         if self.db_path.startswith("~"):
             self.db_path = str(Path(self.db_path).expanduser())
+        
+        # Long-lived read-only connections shared by every read method
+        self.pool = ReadOnlyConnectionPool(self.db_path)
+        
+        # Parsed text_json words per frame id (LRU), so frames are parsed once
+        self._json_cache = OrderedDict()
+        self._json_cache_lock = threading.Lock()
+        
+        # Cleanup and dedup stages run between fetching and formatting
+        self.cleaner = OcrCleaner()
+        self.deduplicator = FrameDeduplicator()
+        self.ranker = BM25Ranker()
+        
+        # Full-text index over the OCR history, opened on first search
+        self._search_index = None
+        self._search_index_lock = threading.Lock()
+        
+        # Lock-wait statistics for reads (Screenpipe writes while we read)
+        self.read_stats = {
+            "reads": 0,
+            "retries": 0,
+            "lock_wait_total": 0.0,
+            "lock_wait_max": 0.0,
+            "last_lock_wait": 0.0
+        }
+        self._stats_lock = threading.Lock()
+
+    def close(self):
+        """Close the pooled database connections and the search index."""
+        self.pool.close()
+        if self._search_index is not None:
+            self._search_index.close()
+
+    def _read(self, read_fn, conn=None, end_transaction=True):
+        """
+        Run read_fn(conn) inside one read transaction, retrying if the database is busy.
+        
+        The transaction gives read_fn a consistent WAL snapshot even though
+        Screenpipe keeps writing. Busy/locked errors are retried with jittered
+        exponential backoff until SCREENPIPE_BUSY_TIMEOUT seconds have passed.
+        
+        Args:
+            read_fn: Callable taking a connection and returning the result
+            conn: Connection to use (defaults to one borrowed from the pool)
+            end_transaction: Set to False to keep the snapshot open for more reads
+            
+        Returns:
+            Whatever read_fn returns
+        """
+        if conn is None:
+            with self.pool.connection() as conn:
+                return self._read(read_fn, conn, end_transaction)
+        
+        started = time.monotonic()
+        deadline = started + config.SCREENPIPE_BUSY_TIMEOUT
+        lock_wait = 0.0
+        retries = 0
+        
+        while True:
+            attempt_started = time.monotonic()
+            try:
+                conn.execute("BEGIN")
+                result = read_fn(conn)
+                if end_transaction:
+                    conn.commit()
+                break
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                now = time.monotonic()
+                lock_wait += now - attempt_started
+                if not _is_busy_error(e) or now >= deadline:
+                    self._record_read(lock_wait, retries)
+                    raise
+                
+                # Full jitter keeps concurrent readers from retrying in lockstep
+                delay = min(config.SCREENPIPE_RETRY_MAX_DELAY,
+                            config.SCREENPIPE_RETRY_BASE_DELAY * (2 ** retries))
+                delay = min(random.uniform(0, delay), deadline - now)
+                time.sleep(delay)
+                lock_wait += delay
+                retries += 1
+        
+        self._record_read(lock_wait, retries)
+        return result
+
+    def _iter_read(self, query, params, batch_size=None):
+        """
+        Yield rows of a query in fetchmany batches from one read snapshot.
+        
+        Busy errors are retried (as in _read) until the first batch arrives;
+        after that the snapshot is fixed and rows stream without locking.
+        The connection goes back to the pool when the generator finishes or
+        is closed early.
+        """
+        batch_size = batch_size or config.OCR_FETCH_BATCH_SIZE
+        
+        def start(conn):
+            db_cursor = conn.execute(query, params)
+            return db_cursor, db_cursor.fetchmany(batch_size)
+        
+        with self.pool.connection() as conn:
+            db_cursor, batch = self._read(start, conn, end_transaction=False)
+            try:
+                while batch:
+                    for row in batch:
+                        yield row
+                    batch = db_cursor.fetchmany(batch_size)
+            finally:
+                db_cursor.close()
+
+    def _record_read(self, lock_wait, retries):
+        """Add one read's lock wait to the statistics."""
+        with self._stats_lock:
+            self.read_stats["reads"] += 1
+            self.read_stats["retries"] += retries
+            self.read_stats["lock_wait_total"] += lock_wait
+            self.read_stats["lock_wait_max"] = max(self.read_stats["lock_wait_max"], lock_wait)
+            self.read_stats["last_lock_wait"] = lock_wait
+        if retries:
+            print(f"Screenpipe read waited {lock_wait:.3f}s on database locks ({retries} retries)")
+
+    def get_read_stats(self):
+        """Return a copy of the read lock-wait statistics."""
+        with self._stats_lock:
+            return dict(self.read_stats)
 
     def test_connection(self):
         """Test the connection to the Screenpipe database."""
         try:
             print(f"Attempting to connect to database at: {self.db_path}")
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
+            
+            # Read-only connections can't create the file, so set it up first
+            if not Path(self.db_path).exists():
+                print("Database file not found. Creating test tables...")
+                return self._create_test_tables()
+            
+            tables = self._read(lambda conn: [tuple(row) for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table'"
+            ).fetchall()])
             print(f"Found tables: {tables}")
-            conn.close()
             
             # If no tables exist, we'll create a simple test structure
             if not tables:
@@ -120,6 +293,187 @@ class ScreenpipeConnector:
             print(f"Error creating test tables: {e}")
             return False
 
+    def iter_ocr_text(self, seconds_ago=300, app_filter=None, limit=None, batch_size=None,
+                      source=None, min_confidence=None, region=None):
+        """
+        Stream OCR text from the specified time window without loading it all.
+        
+        Args:
+            seconds_ago: How far back in time to look (in seconds)
+            app_filter: Optional filter for specific applications
+            limit: Maximum number of records to return
+            batch_size: Rows pulled per fetchmany call (defaults to OCR_FETCH_BATCH_SIZE)
+            source: "text" for ocr_text.text, "json" to rebuild the text from the
+                word-level ocr_text.text_json (defaults to OCR_TEXT_SOURCE)
+            min_confidence: In json mode, drop words below this confidence (0-100)
+            region: In json mode, "focused" to keep only the focused window's
+                frames, or (left, top, width, height) to keep only words inside
+                it (defaults to OCR_REGION)
+            
+        Yields:
+            Dictionaries containing OCR data with metadata, oldest first
+        """
+        source = source or config.OCR_TEXT_SOURCE
+        if region is None:
+            region = ocr_json.parse_region(config.OCR_REGION)
+        batch_size = batch_size or config.OCR_FETCH_BATCH_SIZE
+        
+        # Calculate timestamp threshold
+        current_time = int(time.time())
+        timestamp_threshold = current_time - seconds_ago
+        
+        # Build query
+        columns = OCR_COLUMNS + ", ocr_text.text_json" if source == "json" else OCR_COLUMNS
+        query = f"""
+            SELECT {columns}
+            FROM ocr_text 
+            JOIN frames ON ocr_text.frame_id = frames.id 
+            WHERE frames.timestamp > ?
+        """
+        params = [timestamp_threshold]
+        
+        if app_filter:
+            query += " AND frames.app_name LIKE ?"
+            params.append(f"%{app_filter}%")
+            
+        query += " ORDER BY frames.timestamp ASC"
+        
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        rows = self._iter_read(query, params, batch_size)
+        try:
+            while True:
+                batch = [dict(row) for row in islice(rows, batch_size)]
+                if not batch:
+                    break
+                if source == "json":
+                    batch = self._extract_json_text(batch, min_confidence, region)
+                for row in batch:
+                    if row['text'] and row['text'].strip():  # Only include non-empty text
+                        yield row
+        finally:
+            rows.close()
+
+    def _extract_json_text(self, rows, min_confidence=None, region=None):
+        """
+        Replace each row's text with the confident words from its text_json.
+        
+        Frames not seen before are parsed together and cached by frame id;
+        rows without usable text_json keep their plain text.
+        """
+        if min_confidence is None:
+            min_confidence = config.OCR_MIN_CONFIDENCE
+        
+        with self._json_cache_lock:
+            missing = [row for row in rows if row['frame_id'] not in self._json_cache]
+        
+        # Parse outside the lock so other threads aren't blocked meanwhile
+        parsed = {row['frame_id']: ocr_json.parse_words(row['text_json']) for row in missing}
+        
+        with self._json_cache_lock:
+            self._json_cache.update(parsed)
+            words_by_frame = {}
+            for row in rows:
+                frame_id = row['frame_id']
+                if frame_id in self._json_cache:
+                    self._json_cache.move_to_end(frame_id)
+                    words_by_frame[frame_id] = self._json_cache[frame_id]
+                else:
+                    words_by_frame[frame_id] = parsed.get(frame_id)
+            while len(self._json_cache) > config.TEXT_JSON_CACHE_SIZE:
+                self._json_cache.popitem(last=False)
+        
+        for row in rows:
+            words = words_by_frame.get(row['frame_id'])
+            del row['text_json']
+            if region == ocr_json.FOCUSED:
+                if not row['focused']:
+                    # Another window's frame: outside the focused window
+                    row['text'] = ""
+                elif words is not None:
+                    row['text'] = ocr_json.words_to_text(words, min_confidence)
+            elif words is not None:
+                row['text'] = ocr_json.words_to_text(words, min_confidence, region)
+        return rows
+
+    def iter_ocr_text_within_budget(self, max_chars, seconds_ago=300, app_filter=None, batch_size=None):
+        """
+        Stream the newest OCR text from the time window that fits in a character budget.
+        
+        A window function over ocr_text.text_length picks the newest frames
+        whose running total fits in max_chars (plus the one frame that crosses
+        it), so only those rows' text is read from disk.
+        
+        Args:
+            max_chars: Character budget for the OCR text
+            seconds_ago: How far back in time to look (in seconds)
+            app_filter: Optional filter for specific applications
+            batch_size: Rows pulled per fetchmany call (defaults to OCR_FETCH_BATCH_SIZE)
+            
+        Yields:
+            Dictionaries containing OCR data with metadata, oldest first
+        """
+        timestamp_threshold = int(time.time()) - seconds_ago
+        
+        # text_length can be missing on older rows, so fall back to LENGTH(text)
+        app_clause = " AND frames.app_name LIKE ?" if app_filter else ""
+        query = f"""
+            SELECT {OCR_COLUMNS}
+            FROM (
+                SELECT
+                    ocr_text.rowid AS ocr_id,
+                    SUM(COALESCE(ocr_text.text_length, LENGTH(ocr_text.text))) OVER (
+                        ORDER BY frames.timestamp DESC, frames.id DESC
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                    ) AS newer_length
+                FROM ocr_text 
+                JOIN frames ON ocr_text.frame_id = frames.id 
+                WHERE frames.timestamp > ?{app_clause}
+                  AND COALESCE(ocr_text.text_length, LENGTH(ocr_text.text)) > 0
+            ) AS budgeted
+            JOIN ocr_text ON ocr_text.rowid = budgeted.ocr_id
+            JOIN frames ON ocr_text.frame_id = frames.id
+            WHERE COALESCE(budgeted.newer_length, 0) < ?
+            ORDER BY frames.timestamp ASC
+        """
+        params = [timestamp_threshold]
+        if app_filter:
+            params.append(f"%{app_filter}%")
+        params.append(max_chars)
+        
+        for row in self._iter_read(query, params, batch_size):
+            if row['text'] and row['text'].strip():  # Only include non-empty text
+                yield dict(row)
+
+    def iter_ocr_text_between(self, start, end, batch_size=None):
+        """
+        Stream OCR text of the frames captured in [start, end), oldest first.
+        
+        Args:
+            start: Epoch seconds (inclusive)
+            end: Epoch seconds (exclusive)
+            batch_size: Rows pulled per fetchmany call (defaults to OCR_FETCH_BATCH_SIZE)
+            
+        Yields:
+            Dictionaries containing OCR data with metadata
+        """
+        query = f"""
+            SELECT {OCR_COLUMNS}
+            FROM ocr_text 
+            JOIN frames ON ocr_text.frame_id = frames.id 
+            WHERE frames.timestamp >= ? AND frames.timestamp < ?
+            ORDER BY frames.timestamp ASC
+        """
+        rows = self._iter_read(query, [start, end], batch_size)
+        try:
+            for row in rows:
+                if row['text'] and row['text'].strip():
+                    yield dict(row)
+        finally:
+            rows.close()
+
     def get_ocr_text(self, seconds_ago=300, app_filter=None, limit=None):
         """
         Retrieve OCR text from the specified time window.
@@ -133,75 +487,219 @@ class ScreenpipeConnector:
             A list of dictionaries containing OCR data with metadata
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            return list(self.iter_ocr_text(seconds_ago, app_filter, limit))
+        except Exception as e:
+            raise Exception(f"Error retrieving OCR text: {e}")
+
+    def get_new_ocr_text(self, cursor, seconds_ago=None, app_filter=None, limit=None):
+        """
+        Retrieve OCR text added since the cursor's last position and advance it.
+        
+        Rows are picked by ocr_text rowid, so a frame whose OCR row was written
+        after later frames is still returned once it arrives.
+        
+        Args:
+            cursor: OcrCursor holding the last processed OCR row
+            seconds_ago: Never look further back than this (defaults to DEFAULT_TIME_WINDOW)
+            app_filter: Optional filter for specific applications
+            limit: Maximum number of records to return
             
-            # Calculate timestamp threshold
-            current_time = int(time.time())
-            timestamp_threshold = current_time - seconds_ago
-            
-            # Build query
-            query = """
-                SELECT 
-                    frames.timestamp, 
-                    ocr_text.text, 
-                    frames.app_name, 
-                    frames.window_name,
-                    frames.browser_url,
-                    frames.focused
+        Returns:
+            A list of dictionaries containing OCR data with metadata, in the
+            order the OCR rows were written
+        """
+        try:
+            if seconds_ago is None:
+                seconds_ago = config.DEFAULT_TIME_WINDOW
+            timestamp_threshold = int(time.time()) - seconds_ago
+            
+            # The rowid is the primary key, so this range scan only touches new rows
+            query = f"""
+                SELECT {OCR_COLUMNS}
                 FROM ocr_text 
                 JOIN frames ON ocr_text.frame_id = frames.id 
-                WHERE frames.timestamp > ?
+                WHERE ocr_text.rowid > ? AND frames.timestamp > ?
             """
-            params = [timestamp_threshold]
+            params = [cursor.last_ocr_id or 0, timestamp_threshold]
             
             if app_filter:
                 query += " AND frames.app_name LIKE ?"
                 params.append(f"%{app_filter}%")
                 
-            query += " ORDER BY frames.timestamp ASC"
+            query += " ORDER BY ocr_text.rowid ASC"
             
             if limit:
                 query += " LIMIT ?"
                 params.append(limit)
             
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+            rows = self._read(
+                lambda conn: [dict(row) for row in conn.execute(query, params).fetchall()]
+            )
             
-            # Convert to list of dictionaries
-            results = []
-            for row in rows:
-                if row['text'] and row['text'].strip():  # Only include non-empty text
-                    results.append(dict(row))
+            # Advance past empty rows too, so they are not read again
+            cursor.advance(rows)
+            return [row for row in rows if row['text'] and row['text'].strip()]
             
-            conn.close()
-            return results
+        except Exception as e:
+            raise Exception(f"Error retrieving new OCR text: {e}")
+
+    def get_seen_ocr_text(self, cursor, seconds_ago):
+        """
+        Retrieve OCR text from the time window up to the cursor's position.
+        
+        Args:
+            cursor: OcrCursor holding the last processed OCR row
+            seconds_ago: How far back in time to look (in seconds)
             
+        Returns:
+            A list of dictionaries containing OCR data with metadata, oldest first
+        """
+        if cursor.last_ocr_id is None:
+            return []
+        query = f"""
+            SELECT {OCR_COLUMNS}
+            FROM ocr_text 
+            JOIN frames ON ocr_text.frame_id = frames.id 
+            WHERE frames.timestamp > ? AND ocr_text.rowid <= ?
+            ORDER BY frames.timestamp ASC, frames.id ASC
+        """
+        params = [int(time.time()) - seconds_ago, cursor.last_ocr_id]
+        try:
+            rows = self._read(
+                lambda conn: [dict(row) for row in conn.execute(query, params).fetchall()]
+            )
+            return [row for row in rows if row['text'] and row['text'].strip()]
         except Exception as e:
             raise Exception(f"Error retrieving OCR text: {e}")
 
-    def format_ocr_data(self, ocr_data, max_length=None):
+    def _get_windowed_ocr_text(self, seconds_ago):
+        """
+        Get OCR data for the time window, reusing rows fetched on earlier calls.
+        
+        Only OCR rows past the cursor are read on repeated calls. After a
+        restart the buffer is rebuilt from the rows up to the saved position,
+        and reading resumes from there.
+        """
+        cursor = self.cursor
+        return cursor.update_window(
+            seconds_ago,
+            lambda seconds: self.get_seen_ocr_text(cursor, seconds),
+            lambda seconds: self.get_new_ocr_text(cursor, seconds_ago=seconds)
+        )
+
+    def clean_ocr_data(self, ocr_data):
+        """
+        Strip boilerplate lines, noise tokens and extra whitespace from OCR data.
+        
+        Args:
+            ocr_data: Iterable of OCR data dictionaries for one time window
+            
+        Returns:
+            A list of cleaned copies of the rows
+        """
+        cleaned = self.cleaner.clean(ocr_data)
+        stats = self.cleaner.last_stats
+        if stats["bytes_before"]:
+            print(f"OCR cleanup: {stats['bytes_before']} -> {stats['bytes_after']} bytes "
+                  f"({stats['reduction']:.0%} smaller, {stats['lines_dropped']} lines dropped)")
+        return cleaned
+
+    def prepare_ocr_data(self, ocr_data, clean=None, dedupe=None):
+        """
+        Run the cleanup and dedup stages over OCR data.
+        
+        Args:
+            ocr_data: Iterable of OCR data dictionaries, oldest first
+            clean: Strip boilerplate and noise (defaults to OCR_CLEANUP_ENABLED)
+            dedupe: Merge duplicate frames (defaults to OCR_DEDUP_ENABLED)
+            
+        Returns:
+            The prepared rows (the input unchanged if both stages are off)
+        """
+        if clean is None:
+            clean = config.OCR_CLEANUP_ENABLED
+        if dedupe is None:
+            dedupe = config.OCR_DEDUP_ENABLED
+        
+        # Cleanup goes first: once clocks and chrome are gone, more frames match
+        if clean:
+            ocr_data = self.clean_ocr_data(ocr_data)
+        if dedupe:
+            ocr_data = self.deduplicate_ocr_data(ocr_data)
+        return ocr_data
+
+    def deduplicate_ocr_data(self, ocr_data):
+        """
+        Merge exact and near-duplicate frames in OCR data.
+        
+        Args:
+            ocr_data: Iterable of OCR data dictionaries, oldest first
+            
+        Returns:
+            A list of merged rows (with first_seen, last_seen and frame_count),
+            ordered by when they were last seen
+        """
+        groups = self.deduplicator.dedupe(ocr_data)
+        stats = self.deduplicator.last_stats
+        if stats["frames"]:
+            print(f"Deduplicated {stats['frames']} frames into {stats['groups']} "
+                  f"({stats['dedup_ratio']:.1f}x)")
+        return groups
+
+    def _newest_within_budget(self, rows, max_chars):
+        """Keep the newest rows whose text fits in max_chars (same rule as the SQL budget)."""
+        newer_length = 0
+        start = len(rows)
+        while start > 0 and newer_length < max_chars:
+            start -= 1
+            newer_length += len(rows[start]['text'])
+        return rows[start:]
+
+    def format_ocr_data(self, ocr_data, max_length=None, max_tokens=None, keep_newest=False):
         """
         Format OCR data into a readable text format.
         
+        Rows are consumed lazily, so with an iterator (see iter_ocr_text) no
+        more rows are read once the budget has been filled.
+        
         Args:
-            ocr_data: List of OCR data dictionaries
-            max_length: Maximum length of the formatted text
+            ocr_data: Iterable of OCR data dictionaries
+            max_length: Maximum length of the formatted text in characters
+            max_tokens: Maximum length of the formatted text in (estimated) tokens
+            keep_newest: Cut overflow from the start instead of the end; use
+                with rows that are already limited to the budget
             
         Returns:
             Formatted text string
         """
-        if not ocr_data:
-            return "No screen content found in the specified time window."
-            
-        formatted_text = ""
+        budget = max_length
+        if max_tokens:
+            token_chars = max_tokens * config.CHARS_PER_TOKEN
+            budget = min(budget, token_chars) if budget else token_chars
+        
+        if keep_newest and budget:
+            formatted_text = self.format_ocr_data(ocr_data)
+            if len(formatted_text) > budget:
+                formatted_text = "[Earlier text truncated due to length]\n" + formatted_text[-budget:]
+            return formatted_text
+        
+        buffer = io.StringIO()
+        written = 0
+        truncated = False
+        has_rows = False
         
         # Group by app_name and window_name to reduce repetition
         current_app = None
         current_window = None
         
         for item in ocr_data:
+            has_rows = True
+            
+            if budget and written >= budget:
+                truncated = True
+                break
+            
+            parts = []
             timestamp = time.strftime('%H:%M:%S', time.localtime(item['timestamp']))
             
             # Add app/window header when it changes
@@ -209,41 +707,46 @@ class ScreenpipeConnector:
                 current_app = item['app_name']
                 current_window = item['window_name']
                 
-                formatted_text += f"\n[{timestamp}] {current_app}"
+                parts.append(f"\n[{timestamp}] {current_app}")
                 if current_window:
-                    formatted_text += f" - {current_window}"
+                    parts.append(f" - {current_window}")
                 if item.get('browser_url'):
-                    formatted_text += f" ({item['browser_url']})"
-                formatted_text += ":\n"
+                    parts.append(f" ({item['browser_url']})")
+                parts.append(":\n")
+            
+            # Note how long a merged (deduplicated) block stayed on screen
+            if item.get('frame_count', 1) > 1:
+                first_seen = time.strftime('%H:%M:%S', time.localtime(item['first_seen']))
+                last_seen = time.strftime('%H:%M:%S', time.localtime(item['last_seen']))
+                parts.append(f"(on screen {first_seen}-{last_seen}, {item['frame_count']} captures)\n")
             
             # Add the OCR text
             text = item['text'].strip()
             if text:
-                formatted_text += f"{text}\n\n"
+                parts.append(f"{text}\n\n")
+            
+            chunk = "".join(parts)
+            if budget and written + len(chunk) > budget:
+                chunk = chunk[:budget - written]
+                truncated = True
+            buffer.write(chunk)
+            written += len(chunk)
+            if truncated:
+                break
         
-        # Truncate if needed
-        if max_length and len(formatted_text) > max_length:
-            formatted_text = formatted_text[:max_length] + "\n[Text truncated due to length]"
+        if not has_rows:
+            return "No screen content found in the specified time window."
+        
+        if truncated:
+            buffer.write("\n[Text truncated due to length]")
             
-        return formatted_text 
+        return buffer.getvalue()
 
     def get_current_app_info(self):
         """Get information about the most recent app in focus."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Get the most recent frame with app information
-            cursor.execute("""
-            SELECT app_name, window_name, browser_url
-            FROM frames
-            WHERE focused = 1
-            ORDER BY timestamp DESC
-            LIMIT 1
-            """)
-            
-            result = cursor.fetchone()
-            conn.close()
+            result = self._read(lambda conn: conn.execute(CURRENT_APP_QUERY).fetchone())
             
             if result:
                 return {
@@ -258,25 +761,184 @@ class ScreenpipeConnector:
             print(f"Error getting current app info: {e}")
             return {"app_name": "Unknown", "window_name": "", "browser_url": ""} 
 
-    def get_recent_ocr_text(self, seconds_ago=300):
+    def get_recent_ocr_text(self, seconds_ago=300, max_length=None, max_tokens=None,
+                            dedupe=None, clean=None, source=None, region=None):
         """
         Get formatted OCR text from the specified time window.
         
+        Takes the same arguments as get_recent_ocr_context.
+        
+        Returns:
+            Formatted OCR text string
+        """
+        return self.get_recent_ocr_context(seconds_ago, max_length, max_tokens,
+                                           dedupe, clean, source, region)[0]
+
+    def get_recent_ocr_context(self, seconds_ago=300, max_length=None, max_tokens=None,
+                               dedupe=None, clean=None, source=None, region=None):
+        """
+        Get formatted OCR text from the specified time window, with a fingerprint of its content.
+        
         Args:
             seconds_ago: How far back in time to look (in seconds)
+            max_length: Optional character budget for the formatted text
+            max_tokens: Optional (estimated) token budget for the formatted text
+            dedupe: Merge duplicate frames first (defaults to OCR_DEDUP_ENABLED)
+            clean: Strip boilerplate lines first (defaults to OCR_CLEANUP_ENABLED)
+            source: "text" or "json" (see iter_ocr_text; defaults to OCR_TEXT_SOURCE)
+            region: In json mode, "focused" or (left, top, width, height) (see
+                iter_ocr_text; defaults to OCR_REGION)
             
         Returns:
-            Formatted OCR text string
+            (formatted text, fingerprint): the fingerprint is content_fingerprint()
+            of the rows that were formatted, or None if there is no content
         """
+        source = source or config.OCR_TEXT_SOURCE
+        if dedupe is None:
+            dedupe = config.OCR_DEDUP_ENABLED
+        if clean is None:
+            clean = config.OCR_CLEANUP_ENABLED
+        
         try:
-            # Get OCR data
-            ocr_data = self.get_ocr_text(seconds_ago=seconds_ago)
+            budget = max_length
+            if max_tokens:
+                token_chars = max_tokens * config.CHARS_PER_TOKEN
+                budget = min(budget, token_chars) if budget else token_chars
             
-            # Format the OCR data
-            formatted_text = self.format_ocr_data(ocr_data)
+            # Get OCR data; with a budget, only the newest text that fits is read
+            if source == "json":
+                # Word-level text is rebuilt per frame; parsed frames come from the cache
+                ocr_data = self.iter_ocr_text(seconds_ago=seconds_ago, source="json", region=region)
+            elif self.cursor is not None:
+                ocr_data = self._get_windowed_ocr_text(seconds_ago)
+            elif budget:
+                # Duplicates are merged before the budget is applied, so with
+                # dedupe on a few budgets' worth of the newest text is read
+                fetch_chars = budget * config.OCR_DEDUP_BUDGET_FACTOR if dedupe else budget
+                ocr_data = self.iter_ocr_text_within_budget(fetch_chars, seconds_ago=seconds_ago)
+            else:
+                ocr_data = self.iter_ocr_text(seconds_ago=seconds_ago)
             
-            return formatted_text
+            try:
+                rows = self.prepare_ocr_data(ocr_data, clean=clean, dedupe=dedupe)
+                if budget and isinstance(rows, list):
+                    rows = self._newest_within_budget(rows, budget)
+                rows = list(rows)
+            finally:
+                if hasattr(ocr_data, "close"):
+                    ocr_data.close()
+            
+            # Format the OCR data, keeping the most recent text if it overflows
+            formatted_text = self.format_ocr_data(rows, budget, keep_newest=True)
+            return formatted_text, content_fingerprint(rows) if rows else None
             
         except Exception as e:
             print(f"Error getting recent OCR text: {e}")
-            return "Error retrieving screen content." 
\ No newline at end of file
+            return "Error retrieving screen content.", None
+
+    def get_relevant_ocr_text(self, query, seconds_ago=300, max_length=None, source=None):
+        """
+        Get formatted OCR text from the time window, picking the parts most relevant to a query.
+        
+        The whole window is cleaned, deduplicated and split into chunks; the
+        best BM25 matches for the query are packed into the budget and shown
+        in timestamp order. Without matching terms the newest text wins.
+        
+        Args:
+            query: The user's question
+            seconds_ago: How far back in time to look (in seconds)
+            max_length: Character budget (defaults to MAX_OCR_TEXT_LENGTH)
+            source: "text" or "json" (see iter_ocr_text; defaults to OCR_TEXT_SOURCE)
+            
+        Returns:
+            Formatted OCR text string
+        """
+        max_length = max_length or config.MAX_OCR_TEXT_LENGTH
+        
+        try:
+            rows = self.iter_ocr_text(seconds_ago=seconds_ago, source=source)
+            try:
+                ocr_data = self.prepare_ocr_data(rows)
+                ocr_data = self.ranker.select(query, list(ocr_data), max_length)
+            finally:
+                rows.close()
+            
+            return self.format_ocr_data(ocr_data, max_length, keep_newest=True)
+            
+        except Exception as e:
+            print(f"Error getting relevant OCR text: {e}")
+            return "Error retrieving screen content."
+
+    def get_search_index(self):
+        """Return the full-text search index, opening it on first use."""
+        with self._search_index_lock:
+            if self._search_index is None:
+                self._search_index = OcrSearchIndex(config.OCR_INDEX_PATH)
+            return self._search_index
+
+    def update_search_index(self, batch_size=None):
+        """
+        Add OCR rows written since the last update to the full-text index.
+        
+        Only rows past the index's last ocr_text rowid are read (so OCR that
+        lands after later frames is still picked up), in fetchmany-sized
+        batches that are committed one at a time, so an interrupted first
+        build resumes where it stopped.
+        
+        Returns:
+            The number of OCR rows added
+        """
+        batch_size = batch_size or config.OCR_FETCH_BATCH_SIZE
+        index = self.get_search_index()
+        
+        # Serialize updates so two callers don't index the same rows
+        with self._search_index_lock:
+            last_ocr_id = index.last_ocr_id()
+            if last_ocr_id is None:
+                # Indexes built before rowid tracking only know their last frame
+                last_ocr_id = self._read(lambda conn: conn.execute(
+                    "SELECT COALESCE(MAX(rowid), 0) FROM ocr_text WHERE frame_id <= ?",
+                    [index.last_frame_id()]
+                ).fetchone()[0])
+            query = f"""
+                SELECT {OCR_COLUMNS}
+                FROM ocr_text 
+                JOIN frames ON ocr_text.frame_id = frames.id 
+                WHERE ocr_text.rowid > ?
+                ORDER BY ocr_text.rowid ASC
+            """
+            rows = self._iter_read(query, [last_ocr_id], batch_size)
+            added = 0
+            try:
+                while True:
+                    batch = [dict(row) for row in islice(rows, batch_size)]
+                    if not batch:
+                        break
+                    last_ocr_id = batch[-1]['ocr_id']
+                    batch = [row for row in batch if row['text'] and row['text'].strip()]
+                    index.add_rows(batch, last_ocr_id)
+                    added += len(batch)
+            finally:
+                rows.close()
+        
+        if added:
+            print(f"Indexed {added} new OCR rows for search")
+        return added
+
+    def search(self, query, since=None, until=None, app=None, limit=50):
+        """
+        Full-text search over the OCR history.
+        
+        Args:
+            query: Words to look for (all must match)
+            since: Only frames at or after this time (epoch seconds or datetime)
+            until: Only frames at or before this time (epoch seconds or datetime)
+            app: Optional filter for specific applications
+            limit: Maximum number of results
+            
+        Returns:
+            A list of matches (frame_id, timestamp, app_name, window_name,
+            browser_url, snippet), best match first
+        """
+        self.update_search_index()
+        return self.get_search_index().search(query, since, until, app, limit)
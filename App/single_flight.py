@@ -0,0 +1,60 @@
+"""
+Single-flight coalescing: concurrent calls with the same key share one execution.
+"""
+
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    def __init__(self):
+        """Initialize an empty table of in-flight calls."""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless a call with the same key is already running.
+
+        The first caller (the leader) runs the function; callers arriving while
+        it runs wait for the same result, or the same exception. Nothing is
+        remembered once the call finishes, so later callers run it again.
+
+        Args:
+            key: Hashable identity of the call
+            fn: Function to run
+
+        Returns:
+            The function's result
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def get_stats(self):
+        """Return how many calls ran and how many joined one already in flight."""
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced,
+                    "in_flight": len(self._calls)}
@@ -0,0 +1,451 @@
+"""
+Hierarchical summaries of the OCR history: minutes roll up into hours, hours into days.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+import config
+from llama_client import is_error_response
+from ocr_dedup import line_hash
+
+MINUTE = "minute"
+HOUR = "hour"
+DAY = "day"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket_summaries (
+    level TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    bucket_end INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    frame_count INTEGER NOT NULL DEFAULT 0,
+    created_at INTEGER NOT NULL,
+    PRIMARY KEY (level, bucket_start)
+);
+"""
+
+# Where "this afternoon" etc. start (local hour); earlier in the day they mean since midnight
+PERIOD_START_HOURS = {
+    "today": 0,
+    "this morning": 5,
+    "this afternoon": 12,
+    "this evening": 17,
+    "tonight": 17,
+}
+UNIT_SECONDS = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+LAST_N_RE = re.compile(r"\b(?:last|past|previous)\s+(\d+|an?|one)?\s*(minute|hour|day|week)s?\b")
+
+def bucket_bounds(timestamp, level):
+    """(start, end) in epoch seconds of the local-time minute, hour or day containing timestamp."""
+    moment = datetime.fromtimestamp(timestamp)
+    if level == MINUTE:
+        start = moment.replace(second=0, microsecond=0)
+        end = start + timedelta(minutes=1)
+    elif level == HOUR:
+        start = moment.replace(minute=0, second=0, microsecond=0)
+        end = start + timedelta(hours=1)
+    else:
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start + timedelta(days=1)
+    return int(start.timestamp()), int(end.timestamp())
+
+def bucket_label(level, start, end):
+    """Human-readable time span of a bucket."""
+    if level == DAY:
+        return time.strftime('%a %d %b', time.localtime(start))
+    if level == HOUR:
+        return time.strftime('%a %H:%M', time.localtime(start)) + time.strftime('-%H:%M', time.localtime(end))
+    return time.strftime('%H:%M', time.localtime(start))
+
+def infer_horizon(query, now=None):
+    """
+    How far back a question looks, from phrases like "this afternoon" or "last 3 hours".
+
+    Returns:
+        Seconds, or None if the question names no period
+    """
+    now = now or time.time()
+    text = query.lower()
+
+    match = LAST_N_RE.search(text)
+    if match:
+        count = match.group(1)
+        count = int(count) if count and count.isdigit() else 1
+        return count * UNIT_SECONDS[match.group(2)]
+
+    if "yesterday" in text:
+        return now - bucket_bounds(now - 86400, DAY)[0]
+    if "this week" in text:
+        return UNIT_SECONDS["week"]
+
+    midnight = bucket_bounds(now, DAY)[0]
+    for phrase, start_hour in PERIOD_START_HOURS.items():
+        if phrase in text:
+            start = midnight + start_hour * 3600
+            return now - (start if start < now else midnight)
+    return None
+
+class SummaryStore:
+    def __init__(self, path=None):
+        """
+        Open (or create) the summary database.
+
+        Args:
+            path: SQLite file (defaults to SUMMARY_DB_PATH)
+        """
+        self.path = path or config.SUMMARY_DB_PATH
+        if self.path.startswith("~"):
+            self.path = str(Path(self.path).expanduser())
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, timeout=config.SCREENPIPE_BUSY_TIMEOUT,
+                                    check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the summary database."""
+        with self._lock:
+            self.conn.close()
+
+    def get(self, level, start, end):
+        """Summaries of a level whose buckets start in [start, end), oldest first."""
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT bucket_start, bucket_end, summary, frame_count FROM bucket_summaries
+                WHERE level = ? AND bucket_start >= ? AND bucket_start < ?
+                ORDER BY bucket_start
+                """,
+                (level, start, end)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def last_start(self, level):
+        """Start of the newest summarized bucket of a level (None if there is none)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MAX(bucket_start) FROM bucket_summaries WHERE level = ?", (level,)
+            ).fetchone()
+        return row[0]
+
+    def put_many(self, level, summaries, replace=False):
+        """
+        Store summaries of a level.
+
+        Args:
+            summaries: Iterable of (bucket_start, bucket_end, summary, frame_count)
+            replace: Overwrite buckets already summarized (by default they are left as they are)
+        """
+        now = int(time.time())
+        with self._lock:
+            with self.conn:
+                self.conn.executemany(
+                    f"""
+                    INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO bucket_summaries
+                    (level, bucket_start, bucket_end, summary, frame_count, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    [(level, start, end, summary, frame_count, now)
+                     for start, end, summary, frame_count in summaries]
+                )
+
+    def delete(self, level, bucket_starts):
+        """Forget summaries of a level, so they are made again."""
+        with self._lock:
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM bucket_summaries WHERE level = ? AND bucket_start = ?",
+                    [(level, start) for start in bucket_starts]
+                )
+
+class TimeBucketSummarizer:
+    def __init__(self, screenpipe, llama, store=None, lookback_days=None, grace_seconds=None,
+                 recheck_seconds=None):
+        """
+        Initialize the summarizer.
+
+        A bucket is summarized once it has closed (grace_seconds after its
+        end, for frames written late). Minutes of the last recheck_seconds
+        are read again on every pass, and one that has gained frames since
+        is rebuilt along with its hour and day. Minutes are extracted
+        locally from the OCR text (no model call); an hour is summarized by
+        Gemini from its minutes, a day from its hours.
+
+        Args:
+            screenpipe: ScreenpipeConnector to read OCR text from
+            llama: LlamaClient for the hour and day summaries
+            store: SummaryStore (one on SUMMARY_DB_PATH if omitted)
+            lookback_days: Days of history summarized on the first run
+            grace_seconds: Seconds after its end before a bucket is closed
+            recheck_seconds: How far back minutes are checked for late OCR
+        """
+        self.screenpipe = screenpipe
+        self.llama = llama
+        self.store = store or SummaryStore()
+        self.lookback_days = config.SUMMARY_LOOKBACK_DAYS if lookback_days is None else lookback_days
+        self.grace_seconds = config.SUMMARY_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        self.recheck_seconds = (config.SUMMARY_RECHECK_SECONDS
+                                if recheck_seconds is None else recheck_seconds)
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, now=None):
+        """
+        Summarize every closed bucket not summarized yet (or rebuilt for late OCR).
+
+        Returns:
+            Number of new or rebuilt summaries per level
+        """
+        closed = (now or time.time()) - self.grace_seconds
+        with self._run_lock:
+            counts = {MINUTE: self.summarize_minutes(closed)}
+            counts[HOUR] = self._roll_up(HOUR, MINUTE, closed)
+            counts[DAY] = self._roll_up(DAY, HOUR, closed)
+        if any(counts.values()):
+            print(f"Summarized {counts[MINUTE]} minutes, {counts[HOUR]} hours, {counts[DAY]} days.")
+        return counts
+
+    def _first_start(self, closed):
+        """Start of the history to summarize: lookback_days before closed, at midnight."""
+        return bucket_bounds(closed - self.lookback_days * 86400, DAY)[0]
+
+    def summarize_minutes(self, closed):
+        """
+        Extract a summary for each closed minute after the last one summarized.
+
+        Minutes of the last recheck_seconds are read again: one with more
+        frames than when it was summarized (OCR written after it closed) is
+        extracted again, and its hour and day summaries are dropped so they
+        are rolled up again from it.
+        """
+        first = self._first_start(closed)
+        last = self.store.last_start(MINUTE)
+        new_start = max(first, last + 60 if last is not None else 0)
+        start = min(new_start, max(first, bucket_bounds(closed - self.recheck_seconds, MINUTE)[0]))
+        end = bucket_bounds(closed, MINUTE)[0]
+        stored = {row['bucket_start']: row['frame_count'] for row in self.store.get(MINUTE, start, new_start)}
+        count = 0
+
+        # Read an hour at a time, so boilerplate is recognized across its frames
+        while start < end:
+            chunk_end = min(end, bucket_bounds(start, HOUR)[1])
+            rows = list(self.screenpipe.iter_ocr_text_between(start, chunk_end))
+            # Frames are counted before cleanup: what it drops depends on the
+            # chunk, so only the raw count says whether OCR arrived since
+            frame_counts = Counter(bucket_bounds(row['timestamp'], MINUTE)[0] for row in rows)
+            if rows and config.OCR_CLEANUP_ENABLED:
+                rows = self.screenpipe.clean_ocr_data(rows)
+
+            by_minute = {}
+            for row in rows:
+                by_minute.setdefault(bucket_bounds(row['timestamp'], MINUTE)[0], []).append(row)
+
+            # Quiet minutes are stored too (empty), so they are not read again
+            summaries = []
+            rebuilt = []
+            for minute in range(start, chunk_end, 60):
+                minute_rows = by_minute.get(minute, [])
+                summary = (minute, minute + 60, self.extract_minute(minute_rows), frame_counts[minute])
+                if minute >= new_start:
+                    summaries.append(summary)
+                elif minute not in stored or frame_counts[minute] > stored[minute]:
+                    rebuilt.append(summary)
+            self.store.put_many(MINUTE, summaries)
+            if rebuilt:
+                print(f"Rebuilding {len(rebuilt)} minutes whose OCR arrived late.")
+                self.store.put_many(MINUTE, rebuilt, replace=True)
+                for level in (HOUR, DAY):
+                    self.store.delete(level, {bucket_bounds(minute, level)[0] for minute, *_ in rebuilt})
+            count += len(summaries) + len(rebuilt)
+            start = chunk_end
+        return count
+
+    def extract_minute(self, rows):
+        """
+        Short extract of one minute: the first distinct lines seen in each app and window.
+
+        Returns:
+            Text of at most SUMMARY_MINUTE_CHARS ('' if nothing was on screen)
+        """
+        windows = {}
+        seen = set()
+        for row in rows:
+            lines = windows.setdefault((row['app_name'], row['window_name']), [])
+            for line in row['text'].splitlines():
+                key = line_hash(line)
+                if line.strip() and key not in seen:
+                    seen.add(key)
+                    lines.append(line.strip())
+
+        budget = config.SUMMARY_MINUTE_CHARS // max(1, len(windows))
+        parts = []
+        for (app_name, window_name), lines in windows.items():
+            label = app_name or "Unknown"
+            if window_name:
+                label += f" - {window_name}"
+            text = " / ".join(lines)
+            if len(text) > budget:
+                text = text[:budget].rstrip() + "..."
+            parts.append(f"{label}: {text}")
+        return "\n".join(parts)
+
+    def _roll_up(self, level, child_level, closed):
+        """
+        Summarize each closed hour (or day) from its minute (or hour) summaries.
+
+        Stops at the first bucket that cannot be summarized yet (children
+        missing, Gemini unavailable or failing), so buckets are done in order.
+        """
+        first = self._first_start(closed)
+        done = {row['bucket_start'] for row in self.store.get(level, first, closed)}
+        count = 0
+        start = first
+        while True:
+            bucket_start, bucket_end = bucket_bounds(start, level)
+            if bucket_end > closed:
+                break
+            start = bucket_end
+            if bucket_start in done:
+                continue
+
+            children = self.store.get(child_level, bucket_start, bucket_end)
+            if child_level == MINUTE:
+                expected = (bucket_end - bucket_start) // 60
+            else:
+                expected = len(self._hour_starts(bucket_start, bucket_end))
+            if len(children) < expected:
+                break
+
+            frame_count = sum(child['frame_count'] for child in children)
+            parts = [f"[{bucket_label(child_level, child['bucket_start'], child['bucket_end'])}] {child['summary']}"
+                     for child in children if child['summary']]
+            summary = ""
+            if parts:
+                if not self.llama.is_available():
+                    break
+                response = self.llama.query(
+                    "\n".join(parts),
+                    f"summarize in 2-4 sentences what was done on this computer during "
+                    f"{bucket_label(level, bucket_start, bucket_end)}: which apps and sites were used, "
+                    f"for what, and roughly when. The extracts above are labelled with their time.",
+                    max_tokens=config.SUMMARY_MAX_TOKENS
+                )
+                if is_error_response(response):
+                    print(f"Could not summarize {bucket_label(level, bucket_start, bucket_end)}: {response}")
+                    break
+                summary = response.strip()
+
+            self.store.put_many(level, [(bucket_start, bucket_end, summary, frame_count)])
+            count += 1
+        return count
+
+    @staticmethod
+    def _hour_starts(start, end):
+        """Starts of the hours in [start, end) (23 or 25 on days the clocks change)."""
+        starts = []
+        while start < end:
+            starts.append(start)
+            start = bucket_bounds(start, HOUR)[1]
+        return starts
+
+    def build_context(self, start, end, max_chars=None):
+        """
+        Summaries covering [start, end), for questions about a longer period.
+
+        Each stretch uses the coarsest summary lying inside the range: whole
+        days by their day summary, other whole hours by their hour summary,
+        and the rest minute by minute.
+
+        Args:
+            start: Epoch seconds
+            end: Epoch seconds
+            max_chars: Character budget (defaults to SUMMARY_CONTEXT_CHARS);
+                the oldest text is cut first
+
+        Returns:
+            Labelled summaries, oldest first ('' if none)
+        """
+        max_chars = max_chars or config.SUMMARY_CONTEXT_CHARS
+        start = bucket_bounds(start, MINUTE)[0]
+        summaries = {level: {row['bucket_start']: row for row in self.store.get(level, start, end)}
+                     for level in (DAY, HOUR, MINUTE)}
+
+        parts = []
+        cursor = start
+        while cursor < end:
+            for level in (DAY, HOUR, MINUTE):
+                bucket_start, bucket_end = bucket_bounds(cursor, level)
+                row = summaries[level].get(bucket_start)
+                if row and bucket_start >= start and bucket_end <= end:
+                    if row['summary']:
+                        parts.append(f"[{bucket_label(level, bucket_start, bucket_end)}] {row['summary']}")
+                    cursor = bucket_end
+                    break
+            else:
+                # Not summarized (yet)
+                cursor = bucket_bounds(cursor, MINUTE)[1]
+
+        text = "\n".join(parts)
+        if len(text) > max_chars:
+            text = "[Earlier summaries truncated due to length]\n" + text[-max_chars:]
+        return text
+
+    def start(self, interval=None):
+        """Summarize in a background (daemon) thread every interval seconds."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval or config.SUMMARY_INTERVAL,),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current pass."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self, interval):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error summarizing OCR history: {e}")
+            self._stop.wait(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize the Screenpipe OCR history by minute, hour and day')
+    parser.add_argument('--db-path', type=str, default=config.SCREENPIPE_DB_PATH,
+                        help='Path to Screenpipe SQLite database')
+    parser.add_argument('--once', action='store_true', help='Run one pass and exit')
+    parser.add_argument('--interval', type=int, default=config.SUMMARY_INTERVAL,
+                        help='Seconds between passes')
+    args = parser.parse_args()
+
+    from screenpipe_connector import ScreenpipeConnector
+    from llama_client import LlamaClient
+    summarizer = TimeBucketSummarizer(ScreenpipeConnector(args.db_path), LlamaClient())
+    if args.once:
+        summarizer.run_once()
+        return
+    try:
+        while True:
+            summarizer.run_once()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nSummarizer stopped by user.")
+
+if __name__ == '__main__':
+    main()
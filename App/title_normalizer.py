@@ -0,0 +1,230 @@
+"""
+Reduce window titles to templates so windows of the same site share one cache key.
+"""
+
+import random
+import re
+import threading
+from collections import Counter
+import config
+from ocr_dedup import _hash64
+
+# Browser names, as apps and as appended to every page title
+BROWSER_NAMES = (r"google chrome|chromium|mozilla firefox|firefox|microsoft\s?edge|brave|"
+                 r"safari|opera|vivaldi|arc")
+BROWSER_SUFFIX_RE = re.compile(rf"\s+[-–—|]\s+({BROWSER_NAMES})$")
+BROWSER_APP_RE = re.compile(rf"^({BROWSER_NAMES}|chrome|msedge)\b")
+# Tab counters, unread counts and notification badges
+COUNTER_RE = re.compile(r"^\s*(\(\d+\+?\)|\[\d+\+?\]|•)\s*|\s+and \d+ more pages?\b|\(\d+\+?\)")
+URL_RE = re.compile(r"\b(https?://\S+|www\.\S+)")
+EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+# Ids and numbers: runs of digits, and long tokens mixing letters and digits (hashes, uuids)
+ID_RE = re.compile(r"\b(?=[\w-]*\d)[0-9a-f-]{8,}\b|\b(?=\w*\d)(?=\w*[a-z])\w{12,}\b|\d+")
+SEPARATOR_RE = re.compile(r"\s+[-–—|·•:]\s+")
+TOKEN_RE = re.compile(r"\w+")
+
+ITEM = "*"  # placeholder for the per-item part of a title
+SITE_MAX_WORDS = 4  # longer end segments are content, never a site name
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Sites and apps whose titles are "<item> - <name>" (or "<name> - <item>"): the
+# item (a video, article, document, search) changes, the name says where it is
+ITEM_SITES = {
+    "youtube", "youtube music", "netflix", "twitch", "spotify", "wikipedia", "reddit",
+    "google search", "google docs", "google sheets", "google slides", "google drive",
+    "google classroom", "gmail", "outlook", "khan academy", "duolingo", "quizlet",
+    "scratch", "notion", "discord", "slack", "whatsapp", "visual studio code",
+} | {name.strip().lower() for name in config.TITLE_ITEM_SITES.split(",") if name.strip()}
+
+def is_browser(app_name):
+    """True if an app name is a web browser (whose windows can show any site)."""
+    return bool(BROWSER_APP_RE.match(" ".join((app_name or "").lower().split())))
+
+def split_title(window_name):
+    """
+    Clean a window title and split it into segments.
+
+    The title is lowercased, browser names, counters and badges are removed,
+    and URLs, emails, ids and numbers are replaced by placeholders.
+
+    Returns:
+        List of non-empty segments (e.g. ['how to draw a cat', 'youtube'])
+    """
+    title = (window_name or "").lower().strip()
+    title = BROWSER_SUFFIX_RE.sub("", title)
+    title = COUNTER_RE.sub(" ", title)
+    title = URL_RE.sub("<url>", title)
+    title = EMAIL_RE.sub("@", title)
+    title = ID_RE.sub("#", title)
+    segments = (" ".join(segment.split()) for segment in SEPARATOR_RE.split(title))
+    return [segment for segment in segments if segment.strip("#-–—|·•: ")]
+
+def jaccard(a, b):
+    """Share of tokens two site names have in common (0-1)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class SiteIndex:
+    def __init__(self, min_similarity=None, min_items=None, num_hashes=None, band_size=None,
+                 max_segments=None):
+        """
+        Initialize an index holding the built-in ITEM_SITES.
+
+        Only the end segments of titles (where sites and apps put their
+        name) are matched, never the per-item part, so two titles that read
+        differently share a template only if they end in the same site.
+        A segment is a site if it is in ITEM_SITES, if it has ended titles
+        of min_items different items (learned from analyzed windows), or if
+        it is short and shares min_similarity of its tokens with a site
+        ("khan academy kids" with "khan academy"). Candidates come from a
+        MinHash signature index, so the cost does not grow with the number
+        of sites.
+
+        Args:
+            min_similarity: Token Jaccard similarity (0-1) for a segment to match a site
+            min_items: Different items an end segment must be seen with to become a site
+            num_hashes: MinHash signature length
+            band_size: Signature values per index band
+            max_segments: End segments whose items are tracked before the oldest are forgotten
+        """
+        self.min_similarity = (config.TITLE_GROUP_MIN_SIMILARITY
+                               if min_similarity is None else min_similarity)
+        self.min_items = config.TITLE_SITE_MIN_ITEMS if min_items is None else min_items
+        self.num_hashes = num_hashes or config.TITLE_SIGNATURE_SIZE
+        self.band_size = band_size or 2
+        self.max_segments = max_segments or config.TITLE_MAX_TRACKED_SEGMENTS
+        # Fixed coefficients, so signatures are the same in every process
+        rng = random.Random(0x5eed)
+        self.coefficients = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+                             for _ in range(self.num_hashes)]
+
+        self.sites = {}  # site name -> its token set
+        self.bands = {}  # (band, values) -> site names in that bucket
+        self.items = {}  # (side, end segment) -> items seen with it (up to min_items)
+        self._lock = threading.Lock()
+        self.stats = Counter()
+        for site in ITEM_SITES:
+            self._add_site_locked(site)
+
+    def signature(self, tokens):
+        """MinHash signature of a token set."""
+        hashes = [_hash64(token) for token in tokens] or [0]
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.coefficients]
+
+    def _band_keys(self, signature):
+        """Lookup keys for each band of a signature."""
+        return [(start, tuple(signature[start:start + self.band_size]))
+                for start in range(0, len(signature), self.band_size)]
+
+    def _add_site_locked(self, site):
+        """Index a site name; callers hold _lock."""
+        if site in self.sites:
+            return
+        tokens = set(TOKEN_RE.findall(site))
+        self.sites[site] = tokens
+        for band_key in self._band_keys(self.signature(tokens)):
+            self.bands.setdefault(band_key, []).append(site)
+
+    def add_site(self, site):
+        """Treat an end segment as a site name from now on."""
+        with self._lock:
+            self._add_site_locked(site)
+
+    def learn(self, window_name):
+        """
+        Record the title of an analyzed window.
+
+        Its first and last segments each count the rest of the title as one
+        item; a segment seen with min_items different items becomes a site.
+        """
+        segments = split_title(window_name)
+        if len(segments) < 2:
+            return
+        with self._lock:
+            for side, segment, item in (("first", segments[0], " - ".join(segments[1:])),
+                                        ("last", segments[-1], " - ".join(segments[:-1]))):
+                if segment in self.sites or len(segment.split()) > SITE_MAX_WORDS:
+                    continue
+                items = self.items.pop((side, segment), set())
+                items.add(item)
+                if len(items) >= self.min_items:
+                    self._add_site_locked(segment)
+                    self.stats["learned"] += 1
+                    continue
+                self.items[(side, segment)] = items
+                # Forget the segments seen least recently
+                while len(self.items) > self.max_segments:
+                    self.items.pop(next(iter(self.items)))
+
+    def match(self, segment):
+        """The site an end segment names (itself or a similar site), or None."""
+        if len(segment.split()) > SITE_MAX_WORDS:
+            return None
+        with self._lock:
+            self.stats["lookups"] += 1
+            if segment in self.sites:
+                return segment
+            tokens = set(TOKEN_RE.findall(segment))
+            best, best_similarity = None, self.min_similarity
+            for band_key in self._band_keys(self.signature(tokens)):
+                for site in self.bands.get(band_key, ()):
+                    similarity = jaccard(tokens, self.sites[site])
+                    if similarity > best_similarity or (similarity == best_similarity and best is None):
+                        best, best_similarity = site, similarity
+            if best is not None:
+                self.stats["similar"] += 1
+            return best
+
+    def get_stats(self):
+        """Return lookups, sites known, sites learned from titles and segments matched by similarity."""
+        with self._lock:
+            return {
+                "lookups": self.stats["lookups"],
+                "sites": len(self.sites),
+                "learned": self.stats["learned"],
+                "similar": self.stats["similar"]
+            }
+
+# One index per process, so the classifier and the analysis store agree on keys
+_index = None
+_index_lock = threading.Lock()
+
+def get_site_index():
+    """Return the process-wide SiteIndex, creating it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SiteIndex()
+        return _index
+
+def learn_title(window_name):
+    """Record the title of an analyzed window in the site index (see SiteIndex.learn)."""
+    get_site_index().learn(window_name)
+
+def title_template(window_name):
+    """
+    Template of a window title.
+
+    Browser names, counters, ids and numbers are dropped, and in a title
+    made of segments ("How to draw a cat - YouTube") that ends in a site or
+    app known to the site index, the rest is replaced by "*". Any other
+    title keeps all of its words.
+
+    Returns:
+        The template (e.g. '* - youtube', 'roblox - play free'), '' without a title
+    """
+    segments = split_title(window_name)
+    if len(segments) >= 2:
+        index = get_site_index()
+        site = index.match(segments[-1])
+        if site:
+            return f"{ITEM} - {site}"
+        site = index.match(segments[0])
+        if site:
+            return f"{site} - {ITEM}"
+    return " - ".join(segments)
+
+def window_key(app_name, window_name):
+    """Cache key for a window title (see title_template); app names are keyed separately."""
+    return title_template(window_name)
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, session, make_response
+from flask import Flask, request, jsonify, session, make_response, Response
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
@@ -17,6 +17,8 @@ try:
     from screenpipe_connector import ScreenpipeConnector
     from llama_client import LlamaClient
     from query_engine import QueryEngine
+    from ocr_cursor import OcrCursor
+    from analysis_store import AnalysisStore
     import config
     SCREENPIPE_AVAILABLE = True
 except ImportError as e:
@@ -48,10 +50,47 @@ def init_db():
     conn.close()
     print("Database initialized successfully!")
 
+# Screenpipe components shared by the API routes and the monitoring thread
+_components = None
+_components_lock = threading.Lock()
+
+def get_components():
+    """Return the shared (screenpipe, llama, query_engine) tuple, creating it on first use."""
+    global _components
+    with _components_lock:
+        if _components is None:
+            # One connector owns the connection pool and the OCR cursor for the whole process
+            cursor = OcrCursor(config.OCR_CURSOR_PATH, name="dashboard_monitor")
+            screenpipe = ScreenpipeConnector(config.SCREENPIPE_DB_PATH, cursor=cursor)
+            llama = LlamaClient(blocking=False)  # never sleep in a request thread
+            analysis_store = None
+            if config.ANALYSIS_CACHE_ENABLED:
+                try:
+                    analysis_store = AnalysisStore(DB_PATH)
+                except sqlite3.Error as e:
+                    print(f"Could not open analysis cache: {e}")
+            query_engine = QueryEngine(screenpipe, llama, config.DEFAULT_TIME_WINDOW,
+                                       analysis_store=analysis_store)
+            if query_engine.classifier:
+                # Start the local fast path from every analysis stored so far
+                conn = get_db_connection()
+                try:
+                    count = query_engine.classifier.seed_from_db(conn)
+                    print(f"Local classifier seeded with {count} stored analyses.")
+                except sqlite3.Error as e:
+                    print(f"Could not seed local classifier: {e}")
+                finally:
+                    conn.close()
+            _components = (screenpipe, llama, query_engine)
+        return _components
+
 # Define the monitoring function
 def monitoring_function():
     """Background thread function to monitor screen activity and generate alerts."""
     try:
+        # Components live for the whole thread so each cycle only reads new frames
+        screenpipe, llama, query_engine = get_components()
+        
         while True:
             print("Monitoring thread running...")
             
@@ -67,12 +106,7 @@ def monitoring_function():
                 time.sleep(60)  # Sleep for 1 minute before checking again
                 continue
             
-            # Initialize components
             try:
-                screenpipe = ScreenpipeConnector(config.SCREENPIPE_DB_PATH)
-                llama = LlamaClient()
-                query_engine = QueryEngine(screenpipe, llama, config.DEFAULT_TIME_WINDOW)
-                
                 # Get current app info
                 app_info = screenpipe.get_current_app_info()
                 
@@ -85,12 +119,12 @@ def monitoring_function():
                 print(f"Detected app: {app_info['app_name']}")
                 
                 # Get app analysis
-                analysis_result = query_engine.analyze_current_app()
-                
-                # Parse analysis to determine if app is appropriate
-                is_appropriate = True
-                if "not suitable for minors" in analysis_result.lower() or "not appropriate" in analysis_result.lower():
-                    is_appropriate = False
+                # The monitor has no caller waiting on it, so it waits for the
+                # rate limiter instead of failing fast
+                analysis = query_engine.analyze_current_app(blocking=True)
+                if not analysis.ok:
+                    print(f"No analysis available: {analysis.error}")
+                is_appropriate = analysis.is_appropriate
                 
                 # For each child, record app usage and generate alerts if needed
                 for child in children:
@@ -107,12 +141,17 @@ def monitoring_function():
                         app_info['app_name'],
                         app_info.get('window_name', ''),
                         app_info.get('browser_url', ''),
-                        'Unknown',  # Category - would come from analysis
+                        analysis.category,
                         1 if is_appropriate else 0
                     ))
                     
-                    # Generate alert if app is not appropriate
+                    # Generate alert if app is not appropriate; a verdict estimated
+                    # while Gemini is down only raises a low-severity alert
                     if not is_appropriate:
+                        severity = 'low' if analysis.fallback else 'high'
+                        description = f"Child accessed inappropriate app: {app_info['app_name']}. Concerns: {analysis.concerns_text()}"
+                        if analysis.fallback:
+                            description = f"Possibly inappropriate app (estimated while analysis was unavailable): {app_info['app_name']}. Concerns: {analysis.concerns_text()}"
                         conn.execute('''
                         INSERT INTO alerts (
                             child_id, app_name, window_name, browser_url, 
@@ -125,8 +164,8 @@ def monitoring_function():
                             app_info.get('window_name', ''),
                             app_info.get('browser_url', ''),
                             'inappropriate_content',
-                            'high',
-                            f"Child accessed inappropriate app: {app_info['app_name']}. Analysis: {analysis_result[:100]}..."
+                            severity,
+                            description
                         ))
                 
                 conn.commit()
@@ -561,10 +600,8 @@ def get_active_app():
                 }
             })
         
-        # Initialize components
-        screenpipe = ScreenpipeConnector(config.SCREENPIPE_DB_PATH)
-        llama = LlamaClient()
-        query_engine = QueryEngine(screenpipe, llama, config.DEFAULT_TIME_WINDOW)
+        # Reuse the shared components instead of reconnecting on every request
+        screenpipe, llama, query_engine = get_components()
         
         # Get current app info
         app_info = screenpipe.get_current_app_info()
@@ -574,66 +611,20 @@ def get_active_app():
                 'app_info': {}
             })
         
-        # Get app analysis
-        analysis_result = query_engine.analyze_current_app()
-        
-        # Parse analysis to determine if app is appropriate
-        is_appropriate = True
-        if "not suitable for minors" in analysis_result.lower() or "not appropriate" in analysis_result.lower():
-            is_appropriate = False
-        
-        # Check if we have cached analysis
-        conn = get_db_connection()
-        cached_analysis = conn.execute(
-            'SELECT * FROM app_analysis WHERE app_name = ? AND window_name = ?',
-            (app_info['app_name'], app_info.get('window_name', ''))
-        ).fetchone()
+        # Get app analysis (reused from app_analysis while the screen is unchanged)
+        analysis = query_engine.analyze_current_app()
         
-        if cached_analysis:
-            # Use cached analysis
-            app_info.update({
-                'is_appropriate': bool(cached_analysis['is_appropriate']),
-                'category': cached_analysis['category'],
-                'age_rating': cached_analysis['age_rating'],
-                'educational_value': cached_analysis['educational_value'],
-                'potential_concerns': cached_analysis['potential_concerns'],
-                'alternatives': cached_analysis['alternatives'],
-                'last_updated': cached_analysis['last_updated']
-            })
-        else:
-            # Extract information from analysis
-            app_info.update({
-                'is_appropriate': is_appropriate,
-                'category': 'Unknown',  # Would extract from analysis
-                'age_rating': 'Unknown',  # Would extract from analysis
-                'educational_value': 'Unknown',  # Would extract from analysis
-                'potential_concerns': analysis_result[:100] if not is_appropriate else 'None',
-                'alternatives': 'None',  # Would extract from analysis
-                'last_updated': datetime.now().isoformat()
-            })
-            
-            # Cache the analysis
-            conn.execute('''
-            INSERT INTO app_analysis (
-                app_name, window_name, browser_url, category, is_appropriate,
-                age_rating, educational_value, potential_concerns, alternatives,
-                analysis_json, last_updated
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            ''', (
-                app_info['app_name'],
-                app_info.get('window_name', ''),
-                app_info.get('browser_url', ''),
-                app_info['category'],
-                1 if app_info['is_appropriate'] else 0,
-                app_info['age_rating'],
-                app_info['educational_value'],
-                app_info['potential_concerns'],
-                app_info['alternatives'],
-                json.dumps(analysis_result)
-            ))
-            conn.commit()
+        app_info.update({
+            'is_appropriate': analysis.is_appropriate,
+            'category': analysis.category,
+            'age_rating': analysis.age_rating,
+            'educational_value': analysis.educational_value,
+            'potential_concerns': analysis.concerns_text(),
+            'alternatives': analysis.alternatives_text(),
+            'analysis_source': analysis.source,
+            'last_updated': datetime.now().isoformat()
+        })
         
-        conn.close()
         return jsonify({'app_info': app_info})
         
     except Exception as e:
@@ -643,6 +634,33 @@ def get_active_app():
             'app_info': {}
         }), 500
 
+@app.route('/api/current_app/stream', methods=['GET'])
+def stream_active_app():
+    """Stream the analysis of the currently active app as server-sent events."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    if not SCREENPIPE_AVAILABLE:
+        return jsonify({'error': 'Screenpipe is not available'}), 503
+    
+    def generate():
+        try:
+            screenpipe, llama, query_engine = get_components()
+            app_info = screenpipe.get_current_app_info()
+            yield f"event: app_info\ndata: {json.dumps(app_info)}\n\n"
+            
+            if app_info and app_info.get('app_name'):
+                # Each chunk is sent as soon as Gemini produces it
+                for chunk in query_engine.analyze_current_app_stream():
+                    yield f"data: {json.dumps({'text': chunk})}\n\n"
+        except Exception as e:
+            print(f"Error streaming current app analysis: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     # Check if database exists, if not initialize it
     if not os.path.exists(DB_PATH):
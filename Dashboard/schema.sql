@@ -64,6 +64,16 @@ CREATE TABLE IF NOT EXISTS app_analysis (
     potential_concerns TEXT,
     alternatives TEXT,
     analysis_json TEXT,
-    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    window_key TEXT,
+    content_digest TEXT,
+    content_hashes TEXT
 );
 
+CREATE INDEX IF NOT EXISTS idx_app_analysis_digest
+    ON app_analysis (app_name, window_key, content_digest, last_updated);
+CREATE INDEX IF NOT EXISTS idx_app_analysis_window_key
+    ON app_analysis (app_name, window_key, last_updated);
+CREATE INDEX IF NOT EXISTS idx_app_analysis_window_name
+    ON app_analysis (app_name, window_name);
+
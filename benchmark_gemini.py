@@ -0,0 +1,157 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the App directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'App'))
+
+
+def print_separator(title):
+    """Print a separator with a title."""
+    print("\n" + "="*80)
+    print(f" {title} ".center(80, "="))
+    print("="*80 + "\n")
+
+def percentile(values, fraction):
+    """Value at the given fraction (0-1) of a sorted list."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def configure_environment(state_dir, args):
+    """
+    Point the client at the benchmark's own state before App modules are imported.
+
+    config.py reads the environment at import time, so the rate limiter and
+    response cache must be redirected first; otherwise the benchmark would use
+    (and exhaust) the real daily budget and be answered from the real cache.
+    """
+    os.environ["GEMINI_RATE_LIMIT_PATH"] = os.path.join(state_dir, "rate_limit.db")
+    os.environ["GEMINI_REQUESTS_PER_MINUTE"] = str(args.requests_per_minute)
+    os.environ["GEMINI_DAILY_LIMIT"] = str(max(args.requests * 10, 1000))
+    os.environ["LLM_CACHE_PATH"] = os.path.join(state_dir, "llm_cache.db")
+    os.environ["LLM_CACHE_ENABLED"] = "true" if args.cache else "false"
+    os.environ["GEMINI_MAX_RETRIES"] = str(args.max_retries)
+    os.environ.setdefault("GOOGLE_API_KEY", "mock")
+
+def run_benchmark(args):
+    """Send requests from several threads and report throughput and latency."""
+    import mock_gemini_server
+    from llama_client import LlamaClient
+
+    server = None
+    api_url = args.url
+    if not api_url:
+        behavior = mock_gemini_server.MockBehavior(
+            latency=args.latency, latency_ms=args.latency_ms, latency_spread=args.latency_spread,
+            rate_429=args.rate_429, rate_5xx=args.rate_5xx, retry_after=args.retry_after,
+            seed=args.seed
+        )
+        server = mock_gemini_server.start_server(behavior=behavior)
+        api_url = f"http://127.0.0.1:{server.server_port}/v1/models/mock:generateContent"
+    print(f"Target: {api_url}")
+
+    llama = LlamaClient(api_url=api_url)
+    latencies = []
+    first_chunk_latencies = []
+    failures = []
+    lock = threading.Lock()
+    next_request = [0]
+    screen_text = "Sample screen text captured by OCR. " * (args.prompt_chars // 36 + 1)
+
+    def worker():
+        while True:
+            with lock:
+                if next_request[0] >= args.requests:
+                    return
+                number = next_request[0]
+                next_request[0] += 1
+
+            # Distinct prompts, so requests are neither cached nor coalesced
+            query = f"Summarize the screen (request {number})."
+            started = time.monotonic()
+            if args.stream:
+                first_chunk = None
+                chunks = []
+                for chunk in llama.query_stream(screen_text, query):
+                    if first_chunk is None:
+                        first_chunk = time.monotonic() - started
+                    chunks.append(chunk)
+                response = "".join(chunks)
+            else:
+                first_chunk = None
+                response = llama.query(screen_text, query)
+            elapsed = time.monotonic() - started
+
+            with lock:
+                latencies.append(elapsed)
+                if first_chunk is not None:
+                    first_chunk_latencies.append(first_chunk)
+                if response.startswith(("Error", "Rate limit exceeded", "Google Gemini API error")):
+                    failures.append(response)
+
+    print_separator("RUNNING")
+    print(f"{args.requests} requests, {args.threads} threads, "
+          f"{'streaming' if args.stream else 'generateContent'}")
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.monotonic() - started
+
+    print_separator("RESULTS")
+    latencies.sort()
+    first_chunk_latencies.sort()
+    print(f"Duration:        {duration:.2f}s")
+    print(f"Throughput:      {len(latencies) / duration:.1f} requests/s")
+    print(f"Failures:        {len(failures)}")
+    print(f"Latency p50:     {percentile(latencies, 0.50) * 1000:.0f} ms")
+    print(f"Latency p95:     {percentile(latencies, 0.95) * 1000:.0f} ms")
+    print(f"Latency p99:     {percentile(latencies, 0.99) * 1000:.0f} ms")
+    print(f"Latency max:     {latencies[-1] * 1000:.0f} ms")
+    if first_chunk_latencies:
+        print(f"First chunk p50: {percentile(first_chunk_latencies, 0.50) * 1000:.0f} ms")
+        print(f"First chunk p95: {percentile(first_chunk_latencies, 0.95) * 1000:.0f} ms")
+    if server:
+        print(f"Server statuses: {server.RequestHandlerClass.behavior.status_counts}")
+        server.shutdown()
+    for failure in sorted(set(failures))[:5]:
+        print(f"  e.g. {failure}")
+    return not failures or args.allow_failures
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmark LlamaClient against a mock (or real) Gemini endpoint')
+    parser.add_argument('--url', type=str, default=None,
+                        help='generateContent URL to benchmark (default: start a local mock server)')
+    parser.add_argument('--requests', type=int, default=200, help='Number of requests to send')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent client threads')
+    parser.add_argument('--stream', action='store_true', help='Use streamGenerateContent and report first-chunk latency')
+    parser.add_argument('--prompt-chars', type=int, default=4000, help='Size of the screen text sent')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled')
+    parser.add_argument('--requests-per-minute', type=int, default=100000, help='Client-side rate limit')
+    parser.add_argument('--max-retries', type=int, default=3, help='Client retries on 429/5xx')
+    parser.add_argument('--latency', choices=['constant', 'uniform', 'exponential', 'lognormal'],
+                        default='lognormal', help='Mock latency distribution')
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='Mock mean/median latency in ms')
+    parser.add_argument('--latency-spread', type=float, default=0.5, help='Mock latency spread')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Mock share of 429 responses')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='Mock share of 5xx responses')
+    parser.add_argument('--retry-after', type=float, default=None, help='Mock Retry-After seconds on 429')
+    parser.add_argument('--seed', type=int, default=None, help='Mock random seed')
+    parser.add_argument('--allow-failures', action='store_true', help='Exit 0 even if some requests failed')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    with tempfile.TemporaryDirectory() as state_dir:
+        configure_environment(state_dir, args)
+        ok = run_benchmark(args)
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
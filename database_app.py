@@ -382,7 +382,7 @@ def check_alerts():
         
         # Initialize components
         screenpipe = ScreenpipeConnector()
-        llama = LlamaClient()
+        llama = LlamaClient(blocking=False)  # never sleep in a request thread
         query_engine = QueryEngine(screenpipe, llama)
         
         # Get current app info
@@ -392,23 +392,12 @@ def check_alerts():
         # Get OCR text
         ocr_text = screenpipe.get_recent_ocr_text()
         
-        # Analyze content
-        analysis_query = """
-        Analyze this content and determine if it's appropriate for children.
-        Is it appropriate? (Yes/No)
-        Any potential concerns?
-        """
-        
-        analysis_result = llama.query(ocr_text, analysis_query)
-        
-        # Check if inappropriate
-        is_inappropriate = "not appropriate" in analysis_result.lower() or "inappropriate" in analysis_result.lower()
-        
-        # Extract concerns
-        concerns = []
-        if "concern" in analysis_result.lower():
-            concerns_section = analysis_result.lower().split("concern")[1].split("\n")[0]
-            concerns = [concerns_section.strip()]
+        # Analyze content (structured JSON, parsed once)
+        analysis = llama.analyze_app(ocr_text, app_name=app_name, window_name=app_info.get('window_name', ''))
+        if not analysis.ok:
+            print(f"No analysis available: {analysis.error}")
+        is_inappropriate = analysis.ok and not analysis.is_appropriate
+        concerns = analysis.potential_concerns
         
         # Connect to database
         conn = get_db_connection()
@@ -0,0 +1,155 @@
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Add the App directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'App'))
+
+from App.screenpipe_connector import ScreenpipeConnector
+
+
+def print_separator(title):
+    """Print a separator with a title."""
+    print("\n" + "="*80)
+    print(f" {title} ".center(80, "="))
+    print("="*80 + "\n")
+
+def create_database(db_path, journal_mode):
+    """Create an empty Screenpipe-shaped database."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS frames (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER,
+        video_chunk_id INTEGER,
+        offset_index INTEGER,
+        app_name TEXT,
+        window_name TEXT,
+        name TEXT,
+        browser_url TEXT,
+        focused INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS ocr_text (
+        id INTEGER PRIMARY KEY,
+        frame_id INTEGER,
+        text TEXT,
+        text_json TEXT,
+        ocr_engine TEXT,
+        text_length INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS video_chunks (
+        id INTEGER PRIMARY KEY,
+        file_path TEXT
+    );
+    ''')
+    conn.commit()
+    conn.close()
+
+def writer_process(db_path, duration, frames_per_batch, hold_seconds):
+    """Synthetic Screenpipe: keep inserting frames and OCR text until time is up."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    end_time = time.time() + duration
+    batches = 0
+
+    while time.time() < end_time:
+        conn.execute("BEGIN IMMEDIATE")
+        for i in range(frames_per_batch):
+            cursor = conn.execute(
+                """
+                INSERT INTO frames (timestamp, video_chunk_id, offset_index, app_name, window_name, name, browser_url, focused)
+                VALUES (?, 1, ?, ?, ?, ?, ?, 1)
+                """,
+                (int(time.time()), i, 'Chrome', f'Stress Window {batches}', f'frame_{batches}_{i}', 'https://example.com')
+            )
+            text = f"Synthetic OCR text for batch {batches}, frame {i}. " * 20
+            conn.execute(
+                "INSERT INTO ocr_text (frame_id, text, ocr_engine, text_length) VALUES (?, ?, 'synthetic', ?)",
+                (cursor.lastrowid, text, len(text))
+            )
+
+        # Hold the write lock for a while to provoke busy errors on the readers
+        time.sleep(hold_seconds)
+        conn.commit()
+        batches += 1
+
+    conn.close()
+    print(f"Writer finished after {batches} batches")
+
+def reader_thread(screenpipe, end_time, latencies, errors):
+    """Read the recent window and current app in a loop."""
+    while time.time() < end_time:
+        started = time.monotonic()
+        try:
+            screenpipe.get_ocr_text(seconds_ago=300)
+            screenpipe.get_current_app_info()
+            latencies.append(time.monotonic() - started)
+        except Exception as e:
+            errors.append(str(e))
+
+def run_stress_test(duration, readers, journal_mode, frames_per_batch, hold_seconds):
+    """Run a synthetic writer process against concurrent connector reads."""
+    print_separator(f"SCREENPIPE STRESS TEST ({journal_mode.upper()})")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'screenpipe.db')
+        create_database(db_path, journal_mode)
+
+        writer = multiprocessing.Process(
+            target=writer_process,
+            args=(db_path, duration, frames_per_batch, hold_seconds)
+        )
+        writer.start()
+
+        screenpipe = ScreenpipeConnector(db_path)
+        latencies = []
+        errors = []
+        end_time = time.time() + duration
+
+        threads = [
+            threading.Thread(target=reader_thread, args=(screenpipe, end_time, latencies, errors))
+            for _ in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.join()
+
+        stats = screenpipe.get_read_stats()
+        screenpipe.close()
+
+    latencies.sort()
+    print(f"Successful read cycles: {len(latencies)}")
+    print(f"Failed read cycles: {len(errors)}")
+    if latencies:
+        print(f"Read latency p50: {latencies[len(latencies) // 2] * 1000:.1f} ms")
+        print(f"Read latency p95: {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms")
+        print(f"Read latency max: {latencies[-1] * 1000:.1f} ms")
+    print(f"Reads: {stats['reads']}, retries: {stats['retries']}")
+    print(f"Lock wait total: {stats['lock_wait_total']:.3f}s, max: {stats['lock_wait_max']:.3f}s")
+
+    if errors:
+        print(f"❌ First error: {errors[0]}")
+        return False
+    print("✅ No read failed while the writer was running")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress test ScreenpipeConnector reads against a live writer")
+    parser.add_argument("--duration", type=float, default=10, help="Test duration in seconds (default: 10)")
+    parser.add_argument("--readers", type=int, default=4, help="Number of reader threads (default: 4)")
+    parser.add_argument("--journal-mode", default="wal", choices=["wal", "delete"],
+                        help="Journal mode of the synthetic database (default: wal)")
+    parser.add_argument("--frames-per-batch", type=int, default=20, help="Frames per write transaction")
+    parser.add_argument("--hold", type=float, default=0.05, help="Seconds the writer holds its lock per batch")
+
+    args = parser.parse_args()
+
+    ok = run_stress_test(args.duration, args.readers, args.journal_mode, args.frames_per_batch, args.hold)
+    sys.exit(0 if ok else 1)
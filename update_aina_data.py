@@ -13,48 +13,80 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'App'))
 from App.screenpipe_connector import ScreenpipeConnector
 from App.llama_client import LlamaClient
 from App.query_engine import QueryEngine
+from App.ocr_cursor import OcrCursor
+from App.async_llama_client import AsyncLlamaClient
+from App.app_analysis import ANALYSIS_SCHEMA, AppAnalysis, build_analysis_prompt, parse_analysis
+from App.app_classifier import AppClassifier
+from App.analysis_store import AnalysisStore
 import App.config as config
 
 
+def get_db_path():
+    """Path of the dashboard database"""
+    return os.path.join(os.path.dirname(__file__), 'Dashboard/data', 'database.db')
+
 def get_db_connection():
     """Connect to the database"""
-    db_dir = os.path.join(os.path.dirname(__file__), 'Dashboard/data')
-    db_path = os.path.join(db_dir, 'database.db')
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(get_db_path())
     conn.row_factory = sqlite3.Row
     return conn
 
-def update_child_data(child_id, child_name, child_age, screenpipe, llama, query_engine):
-    """Update data for a specific child using real-time OCR and analysis"""
+def load_classifier():
+    """Build the local app classifier, seeded from the stored app analyses (None if disabled)"""
+    if not config.LOCAL_CLASSIFIER_ENABLED:
+        return None
+    classifier = AppClassifier()
+    conn = get_db_connection()
+    try:
+        count = classifier.seed_from_db(conn)
+        print(f"Local classifier seeded with {count} stored analyses.")
+    except sqlite3.Error as e:
+        print(f"Could not seed local classifier: {e}")
+    finally:
+        conn.close()
+    return classifier
+
+def load_analysis_store():
+    """Open the analysis cache on the app_analysis table (None if disabled or unavailable)"""
+    if not config.ANALYSIS_CACHE_ENABLED:
+        return None
+    try:
+        return AnalysisStore(get_db_path())
+    except sqlite3.Error as e:
+        print(f"Could not open analysis cache: {e}")
+        return None
+
+def build_query_engine(screenpipe=None):
+    """Build a query engine with the local classifier and analysis cache (if enabled)"""
+    screenpipe = screenpipe or ScreenpipeConnector()
+    return QueryEngine(screenpipe, LlamaClient(), classifier=load_classifier(),
+                       analysis_store=load_analysis_store())
+
+def build_analysis_query(child_age):
+    """Build the structured (JSON) content analysis question for a child of the given age"""
+    return build_analysis_prompt(child_age)
+
+def update_child_data(child_id, child_name, child_age, screenpipe, llama, query_engine,
+                      ocr_text=None, analysis=None, fingerprint=None):
+    """Update data for a specific child using real-time OCR and analysis
+    
+    Args:
+        ocr_text: Screen text already read for this cycle (read here if omitted)
+        analysis: AppAnalysis already fetched for this child (queried here if omitted)
+        fingerprint: Content fingerprint of ocr_text (see get_recent_ocr_context)
+    """
     print(f"\nUpdating data for {child_name} (ID: {child_id})...")
     
     # Connect to the database
     conn = get_db_connection()
     
     try:
-        # Check if status column exists
-        cursor = conn.execute("PRAGMA table_info(children)")
-        columns = [column[1] for column in cursor.fetchall()]
-        has_status_column = 'status' in columns
-        
-        # Update child's basic information
-        print(f"Updating {child_name}'s basic information...")
-        if has_status_column:
-            conn.execute(
-                """
-                UPDATE children 
-                SET status = ?
-                WHERE id = ?
-                """,
-                ('Online', child_id)
-            )
-        
         # Get current app info from Screenpipe
         print("Getting current app info from Screenpipe...")
         app_info = screenpipe.get_current_app_info()
         app_name = app_info.get('app_name', 'Unknown App')
-        window_title = app_info.get('window_title', '')
-        browser_url = app_info.get('url', None)
+        window_title = app_info.get('window_name') or ''
+        browser_url = app_info.get('browser_url')
         
         print(f"Current app: {app_name}")
         print(f"Window title: {window_title}")
@@ -62,86 +94,61 @@ def update_child_data(child_id, child_name, child_age, screenpipe, llama, query_
             print(f"URL: {browser_url}")
         
         # Get OCR text from Screenpipe
-        print("Getting OCR text from Screenpipe...")
-        ocr_text = screenpipe.get_recent_ocr_text()
+        if ocr_text is None:
+            print("Getting OCR text from Screenpipe...")
+            ocr_text, fingerprint = screenpipe.get_recent_ocr_context()
         
         # Truncate OCR text for display
         display_ocr = ocr_text[:100] + "..." if len(ocr_text) > 100 else ocr_text
         print(f"OCR text: {display_ocr}")
         
-        # Analyze content with Llama
-        print("Analyzing content with Llama...")
-        analysis_query = f"""
-        Analyze this content and determine if it's appropriate for a {child_age}-year-old child.
-        Provide the following information:
-        1. Content category (Games, Education, Social Media, Entertainment, or Productivity)
-        2. Is it appropriate for children? (Yes/No)
-        3. Is it educational or productive? (Yes/No)
-        4. Age rating (Everyone, 9+, 12+, 16+, 18+)
-        5. Educational value on a scale of 1-10
-        6. Any potential concerns
-        7. Recommended alternatives if not appropriate
-        """
-        
-        analysis_result = llama.query(ocr_text, analysis_query)
-        print("Analysis complete.")
-        
-        # Parse the analysis result
-        is_appropriate = "not appropriate" not in analysis_result.lower() and "inappropriate" not in analysis_result.lower()
-        is_educational = "educational" in analysis_result.lower() or "productive" in analysis_result.lower()
-        
-        # Extract category
-        category = "Other"  # Default category
-        if "game" in analysis_result.lower():
-            category = "Games"
-        elif "education" in analysis_result.lower():
-            category = "Education"
-        elif "social media" in analysis_result.lower():
-            category = "Social Media"
-        elif "entertainment" in analysis_result.lower():
-            category = "Entertainment"
-        elif "productivity" in analysis_result.lower():
-            category = "Productivity"
-        
-        # Extract age rating
-        age_rating = "Unknown"
-        if "everyone" in analysis_result.lower():
-            age_rating = "Everyone"
-        elif "9+" in analysis_result:
-            age_rating = "9+"
-        elif "12+" in analysis_result:
-            age_rating = "12+"
-        elif "16+" in analysis_result:
-            age_rating = "16+"
-        elif "18+" in analysis_result:
-            age_rating = "18+"
-        
-        # Extract educational value
-        educational_value = 0
-        for i in range(10, 0, -1):
-            if f"{i}/10" in analysis_result or f"{i} out of 10" in analysis_result:
-                educational_value = i
-                break
-        
-        # Extract concerns
-        concerns = []
-        if "concern" in analysis_result.lower():
-            concerns_section = analysis_result.lower().split("concern")[1].split("\n")[0]
-            concerns = [concerns_section.strip()]
+        # Known apps, sites and windows are classified locally
+        if analysis is None and query_engine.classifier:
+            analysis = query_engine.classifier.classify(app_name, window_title, browser_url)
+            if analysis:
+                print(f"Classified {app_name} locally (no model call).")
+        
+        # Analyze content with Llama: an unchanged screen keeps its stored analysis,
+        # and a window this child stayed in only needs its new lines checked
+        if analysis is None:
+            print("Analyzing content with Llama...")
+            if fingerprint:
+                analysis = query_engine.analyze_screen(ocr_text, fingerprint, app_info,
+                                                       child_id=child_id, child_age=child_age)
+            else:
+                analysis = AppAnalysis.from_error("No screen content found in the specified time window.")
+            print(f"Analysis complete ({analysis.source}).")
+        
+        if not analysis.ok:
+            print(f"No analysis available: {analysis.error}")
+        
+        # Check if status column exists (only now, so no write is pending during the analysis)
+        cursor = conn.execute("PRAGMA table_info(children)")
+        columns = [column[1] for column in cursor.fetchall()]
+        has_status_column = 'status' in columns
+        
+        # Update child's basic information
+        print(f"Updating {child_name}'s basic information...")
+        if has_status_column:
+            conn.execute(
+                """
+                UPDATE children 
+                SET status = ?
+                WHERE id = ?
+                """,
+                ('Online', child_id)
+            )
+        
+        is_appropriate = analysis.is_appropriate
+        is_educational = analysis.is_educational
+        category = analysis.category
+        concerns = analysis.potential_concerns
         
         # Create structured analysis
-        structured_analysis = {
-            "app_name": app_name,
-            "window_title": window_title,
-            "browser_url": browser_url,
-            "category": category,
-            "is_appropriate": is_appropriate,
-            "is_educational": is_educational,
-            "age_rating": age_rating,
-            "educational_value": educational_value,
-            "concerns": concerns,
-            "analysis_text": analysis_result
-        }
+        structured_analysis = dict(analysis.to_dict(),
+                                   app_name=app_name,
+                                   window_title=window_title,
+                                   browser_url=browser_url)
         
         # Store OCR data
         print("Storing OCR data...")
@@ -150,36 +157,6 @@ def update_child_data(child_id, child_name, child_age, screenpipe, llama, query_
             (child_id, app_name, ocr_text, json.dumps(structured_analysis), datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
         )
         
-        # Store app analysis if it doesn't exist
-        existing_analysis = conn.execute(
-            "SELECT id FROM app_analysis WHERE app_name = ? AND window_name = ?",
-            (app_name, window_title)
-        ).fetchone()
-        
-        if not existing_analysis:
-            print("Storing app analysis...")
-            conn.execute(
-                """
-                INSERT INTO app_analysis 
-                (app_name, window_name, browser_url, category, is_appropriate, age_rating, 
-                educational_value, potential_concerns, alternatives, analysis_json, last_updated) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    app_name, 
-                    window_title, 
-                    browser_url, 
-                    category, 
-                    1 if is_appropriate else 0, 
-                    age_rating, 
-                    educational_value, 
-                    ", ".join(concerns), 
-                    "", 
-                    json.dumps(structured_analysis), 
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                )
-            )
-        
         # Create current session
         print(f"Creating current session for {app_name}...")
         start_time = datetime.now() - timedelta(minutes=random.randint(5, 30))
@@ -242,9 +219,13 @@ def update_child_data(child_id, child_name, child_age, screenpipe, llama, query_
             )
         )
         
-        # Create an alert if content is inappropriate
+        # Create an alert if content is inappropriate; a verdict estimated while
+        # Gemini is down only raises a low-severity alert
         if not is_appropriate:
             print("Creating alert for inappropriate content...")
+            message = f"Potentially inappropriate content detected in {app_name}: {', '.join(concerns) if concerns else 'Content may not be suitable for children'}"
+            if analysis.fallback:
+                message += " (estimated while analysis was unavailable)"
             conn.execute(
                 """
                 INSERT INTO alerts 
@@ -254,8 +235,8 @@ def update_child_data(child_id, child_name, child_age, screenpipe, llama, query_
                 (
                     child_id, 
                     app_name, 
-                    f"Potentially inappropriate content detected in {app_name}: {', '.join(concerns) if concerns else 'Content may not be suitable for children'}", 
-                    "HIGH", 
+                    message, 
+                    "LOW" if analysis.fallback else "HIGH", 
                     datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
                     0
                 )
@@ -309,15 +290,20 @@ def update_child_data(child_id, child_name, child_age, screenpipe, llama, query_
     finally:
         conn.close()
 
-def update_all_children():
-    """Update data for all children using real-time OCR and analysis"""
+def update_all_children(query_engine=None):
+    """Update data for all children using real-time OCR and analysis
+    
+    Args:
+        query_engine: Optional long-lived QueryEngine to reuse between cycles, with
+            its connector, classifier, analysis cache and previous analyses
+    """
     print("Starting update for all children...")
     
     # Initialize your actual components
     print("Initializing Screenpipe connector and Llama client...")
-    screenpipe = ScreenpipeConnector()
-    llama = LlamaClient()
-    query_engine = QueryEngine(screenpipe, llama)
+    query_engine = query_engine or build_query_engine()
+    screenpipe = query_engine.screenpipe
+    llama = query_engine.llama
     
     # Test connections
     print("Testing Screenpipe connection...")
@@ -347,9 +333,78 @@ def update_all_children():
             print("No children found in the database.")
             return
         
-        for child in children:
-            update_child_data(child['id'], child['name'], child['age'], screenpipe, llama, query_engine)
+        # The screen is the same for every child, so read it once per cycle
+        print("Getting OCR text from Screenpipe...")
+        ocr_text, fingerprint = screenpipe.get_recent_ocr_context()
+        app_info = screenpipe.get_current_app_info()
+        
+        # Known apps, sites and windows are classified locally for everyone
+        analysis = None
+        if query_engine.classifier:
+            analysis = query_engine.classifier.classify(
+                app_info.get('app_name'), app_info.get('window_name'), app_info.get('browser_url')
+            )
+        if analysis:
+            print(f"Classified {app_info.get('app_name')} locally (no model call).")
+        elif query_engine.analysis_store:
+            # An unchanged screen keeps its stored analysis
+            analysis = query_engine.analysis_store.lookup(
+                app_info.get('app_name'), app_info.get('window_name'), fingerprint
+            )
+            if analysis:
+                print(f"Reusing the stored analysis of {app_info.get('app_name')} (screen unchanged).")
+        if analysis:
+            analyses = [analysis] * len(children)
+        else:
+            # Children who stayed in this window only need its new lines checked
+            analysis_by_child = {}
+            new_children = []
+            for child in children:
+                if fingerprint and query_engine.has_previous_analysis(child['id'], app_info):
+                    analysis_by_child[child['id']] = query_engine.analyze_screen(
+                        ocr_text, fingerprint, app_info, child_id=child['id'], child_age=child['age']
+                    )
+                else:
+                    new_children.append(child)
             
+            if new_children:
+                # Pack the other children's analyses into a few batched requests, sent concurrently
+                print(f"Analyzing content for {len(new_children)} children...")
+                async_llama = AsyncLlamaClient(llama)
+                analysis_results = async_llama.run_batch(
+                    [(ocr_text, build_analysis_query(child['age'])) for child in new_children],
+                    max_tokens=config.ANALYSIS_MAX_TOKENS, response_schema=ANALYSIS_SCHEMA
+                )
+                batch_analyses = [parse_analysis(result) for result in analysis_results]
+                for child, analysis in zip(new_children, batch_analyses):
+                    if not analysis.ok:
+                        # Failed (or Gemini is down): a stored or heuristic verdict still raises alerts
+                        print(f"Analysis failed ({analysis.error}); using a fallback.")
+                        analysis = query_engine._fallback_analysis(ocr_text, app_info)
+                    elif fingerprint:
+                        query_engine.remember_analysis(child['id'], app_info, fingerprint, analysis)
+                    analysis_by_child[child['id']] = analysis
+                for analysis in batch_analyses if query_engine.classifier else []:
+                    query_engine.classifier.learn(app_info.get('app_name'), app_info.get('window_name'),
+                                                  app_info.get('browser_url'), analysis)
+                # One analysis per screen is enough to recognize it next cycle
+                stored = next((analysis for analysis in batch_analyses if analysis.ok), None)
+                if stored and fingerprint and query_engine.analysis_store:
+                    query_engine.analysis_store.save(app_info.get('app_name'), app_info.get('window_name'),
+                                                     app_info.get('browser_url'), fingerprint, stored)
+            analyses = [analysis_by_child[child['id']] for child in children]
+        
+        for child, analysis in zip(children, analyses):
+            update_child_data(child['id'], child['name'], child['age'], screenpipe, llama, query_engine,
+                              ocr_text=ocr_text, analysis=analysis, fingerprint=fingerprint)
+            
+        if query_engine.classifier:
+            stats = query_engine.classifier.get_stats()
+            print(f"Local classifier: {stats['lookups']} lookups, {stats['hit_rate']:.0%} answered locally")
+        if query_engine.analysis_store:
+            stats = query_engine.analysis_store.get_stats()
+            print(f"Analysis cache: {stats['hit_rate']:.0%} of screens reused a stored analysis")
+        
         print("\nAll children's data has been updated!")
         print("Refresh the dashboard to see the updated data.")
         
@@ -360,15 +415,20 @@ def update_all_children():
     finally:
         conn.close()
 
-def update_aina_data():
-    """Update Aina's data using real-time OCR and analysis"""
+def update_aina_data(query_engine=None):
+    """Update Aina's data using real-time OCR and analysis
+    
+    Args:
+        query_engine: Optional long-lived QueryEngine to reuse between cycles, with
+            its connector, classifier, analysis cache and previous analyses
+    """
     print("Starting update for Aina's data...")
     
     # Initialize your actual components
     print("Initializing Screenpipe connector and Llama client...")
-    screenpipe = ScreenpipeConnector()
-    llama = LlamaClient()
-    query_engine = QueryEngine(screenpipe, llama)
+    query_engine = query_engine or build_query_engine()
+    screenpipe = query_engine.screenpipe
+    llama = query_engine.llama
     
     # Test connections
     print("Testing Screenpipe connection...")
@@ -463,14 +523,19 @@ def continuous_monitoring(interval=300, all_children=False):
     """
     print(f"Starting continuous monitoring (updating every {interval} seconds)...")
     
+    # Reuse one connector with a saved cursor so each cycle only reads new frames
+    cursor = OcrCursor(config.OCR_CURSOR_PATH, name="continuous_monitoring")
+    # Keep what the classifier learns and the previous analyses from one cycle to the next
+    query_engine = build_query_engine(ScreenpipeConnector(cursor=cursor))
+    
     try:
         while True:
             print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running update cycle...")
             
             if all_children:
-                update_all_children()
+                update_all_children(query_engine)
             else:
-                update_aina_data()
+                update_aina_data(query_engine)
                 
             print(f"Waiting {interval} seconds until next update...")
             time.sleep(interval)